@@ -2,10 +2,59 @@
 Gomoku AI module that coordinates the algorithm and heuristic evaluation.
 """
 
+import heapq
+import multiprocessing
+import re
 import time
+from collections import OrderedDict, deque
+from itertools import chain, islice
+from operator import itemgetter
 
-from srcs.algorithm import MinimaxAlgorithm
+import numpy as np
+
+from srcs.algorithm import GameContext, MinimaxAlgorithm
+from srcs.GomokuLogic import GomokuLogic
 from srcs.heuristic import HeuristicEvaluator
+from srcs.utils import DIRECTIONS_4, OPPONENT, build_capture_table
+
+# Line sweeps for _find_critical_moves: boundary byte between lines, and maximal
+# runs of 3 or more same-colour stones (leftmost-longest, so a match never starts
+# inside a longer run)
+_SWEEP_BOUNDARY = b'\x03'
+_RUN_OF_THREE = re.compile(rb'\x01{3,}|\x02{3,}')
+
+# Per-process state of the move ordering worker pool (see GomokuAI._get_pool)
+_worker_ai = None
+_worker_logic = None
+
+
+def _init_ordering_worker(config):
+    """Builds the evaluator used by an ordering worker process."""
+    global _worker_ai, _worker_logic
+    _worker_ai = GomokuAI(config)
+    _worker_logic = GomokuLogic(config)
+
+
+def _score_candidates_chunk(board_bytes, moves, player, is_critical_attack,
+                            is_critical_defend, history_table, capture_maps, maybe_double_three):
+    """
+    Scores a chunk of candidate moves in a worker process.
+    capture_maps and maybe_double_three are the parent's whole-board maps
+    (see GomokuAI._get_capture_maps and GomokuAI._get_double_three_map).
+    Returns: list of (r, c, score_attack, score_defend, total_score) for the legal moves
+    """
+    board = bytearray(board_bytes)
+    bitboard_row_ofs = _worker_ai._bitboard_row_ofs
+    _worker_ai.algorithm.history_table = history_table
+    legal_moves = [
+        (r, c) for (r, c) in moves
+        if not maybe_double_three[bitboard_row_ofs[r] + c]
+        or _worker_logic.is_legal_move(r, c, player, board)[0]
+    ]
+    return _worker_ai._evaluate_moves_batch(
+        legal_moves, board, player, OPPONENT[player], is_critical_attack, is_critical_defend,
+        capture_maps
+    )
 
 
 class GomokuAI:
@@ -13,6 +62,25 @@ class GomokuAI:
     Manages AI decision-making, move generation, and evaluation.
     """
 
+    # Every attribute is declared here: no per-instance __dict__ to look through
+    __slots__ = (
+        'config', 'board_size', 'max_depth', 'time_limit', 'relevance_range', '_row_ofs',
+        'WIN_SCORE', 'BROKEN_FOUR', 'CAPTURE_SCORE', 'OPEN_THREE', 'OPEN_TWO', 'debug_verbose',
+        'cluster_bfs_max_stones', '_near_tables',
+        '_line_sweeps', '_sweep_lines', '_cell_line_keys',
+        '_bitboard_gather', '_bitboard_len', '_bitboard_row_ofs', '_bitboard_shift', '_capture_shifts',
+        '_stone_tables', '_at_least_two', '_bitboard_mask',
+        '_critical_cells', '_critical_line_runs', 'critical_rescan_limit',
+        '_neighbor_occupied', '_neighbor_counts', 'neighbor_update_limit',
+        'capture_table', 'algorithm', 'heuristic',
+        'ordering_cache_size', '_ordering_cache', '_delta_cache', 'max_delta_cache_size',
+        'win_move_limit', 'block_move_limit', 'phase_move_limits', 'late_game_move_limit',
+        'windowed_search_from_move', 'enable_windowed_search', 'bounding_box_margin',
+        '_tier_buffers', '_threat_runs_buffer', '_critical_buffers', '_five_cells_buffer',
+        'parallel_workers', 'parallel_min_moves', '_pool',
+        'ai_is_thinking', 'current_search_depth', 'last_move_time', 'last_depth_reached',
+    )
+
     def __init__(self, config):
         # Store configuration
         self.config = config
@@ -28,6 +96,8 @@ class GomokuAI:
         self.max_depth = algo_cfg["max_depth"]
         self.time_limit = algo_cfg["time_limit"]
         self.relevance_range = ai_cfg["relevance_range"]
+        # Flat index of the first cell of each row: row_ofs[r] + c instead of r * n + c
+        self._row_ofs = tuple(r * self.board_size for r in range(self.board_size))
 
         # Heuristic scores (for move ordering)
         self.WIN_SCORE = heuristic_cfg["scores"]["win_score"]
@@ -42,16 +112,89 @@ class GomokuAI:
         # Temporarily enable verbose for debugging 5-in-a-row detection
         # self.debug_verbose = True
 
+        # Below this many stones get_piece_clusters uses a BFS instead of NumPy
+        self.cluster_bfs_max_stones = 40
+        self._near_tables = {}
+
+        self._init_line_sweeps()
+        self._init_capture_bitboards()
+        # Incremental state of _find_critical_moves: the cells it last swept and the
+        # runs found on each line then. Up to critical_rescan_limit changed cells are
+        # handled by re-sweeping only the lines through them.
+        self._critical_cells = None
+        self._critical_line_runs = {}
+        self.critical_rescan_limit = 16
+        # Incremental state of _relevant_mask_windowed: the occupancy it last saw and
+        # the stone count of every 3x3 neighbourhood. Up to neighbor_update_limit
+        # changed cells are applied to the counts instead of rebuilding them.
+        self._neighbor_occupied = None
+        self._neighbor_counts = None
+        self.neighbor_update_limit = 16
+        # Capture patterns (P-O-O-P) from every cell, see build_capture_table
+        self.capture_table = build_capture_table(self.board_size)
+
         # Initialize algorithm and heuristic with config
         self.algorithm = MinimaxAlgorithm(config)
         self.heuristic = HeuristicEvaluator(config)
 
+        # Move ordering cache: ordered move lists keyed by position, reused across
+        # iterative deepening iterations (LRU-bounded, cleared for every new root)
+        move_ordering_cfg = ai_cfg["move_ordering"]
+        self.ordering_cache_size = move_ordering_cfg.get("ordering_cache_size", 50000)
+        self._ordering_cache = OrderedDict()
+
+        # Move ordering limits and windowing settings, read once instead of per ordering call
+        priority_cfg = move_ordering_cfg["priority_move_limits"]
+        adaptive_cfg = move_ordering_cfg["adaptive_move_limits"]
+        self.win_move_limit = priority_cfg.get("winning_moves", 5)
+        self.block_move_limit = priority_cfg.get("blocking_moves", 6)
+        # (moves played below which, move limit) per game phase, then the late game limit
+        self.phase_move_limits = (
+            (adaptive_cfg.get("early_game_moves", 10), adaptive_cfg.get("early_game_limit", 18)),
+            (adaptive_cfg.get("mid_game_moves", 25), adaptive_cfg.get("mid_game_limit", 14)),
+        )
+        self.late_game_move_limit = adaptive_cfg.get("late_game_limit", 12)
+        self.windowed_search_from_move = move_ordering_cfg.get("windowed_search_from_move", 10)
+        self.enable_windowed_search = move_ordering_cfg.get("enable_windowed_search", True)
+        self.bounding_box_margin = move_ordering_cfg.get("bounding_box_margin", 2)
+
+        # Move delta cache: the evaluation delta of a move only depends on the position
+        # (zobrist hash + capture counts) and the move, and iterative deepening replays
+        # most of the previous iteration's tree. Reset when it outgrows max_delta_cache_size.
+        self._delta_cache = {}
+        self.max_delta_cache_size = 1 << 18
+
+        # Scratch lists reused by every ordering call instead of being reallocated
+        # per node: the move tiers, and the threat runs, winning/blocking position
+        # sets and opponent five cells of _find_critical_moves
+        self._tier_buffers = {
+            'winning': [],
+            'blocking': [],
+            'high_priority': [],
+            'mid_priority': [],
+            'low_priority': []
+        }
+        self._threat_runs_buffer = []
+        self._critical_buffers = (set(), set())
+        self._five_cells_buffer = []
+
+        # Root move ordering worker pool (opt-in, see _get_pool)
+        self.parallel_workers = move_ordering_cfg.get("parallel_workers", 0)
+        self.parallel_min_moves = move_ordering_cfg.get("parallel_min_moves", 8)
+        self._pool = None
+
         # AI state
         self.ai_is_thinking = False
         self.current_search_depth = 0
         self.last_move_time = 0.0
         self.last_depth_reached = 0
 
+        # Start the pool up front in the main process (not in the worker processes,
+        # whose own GomokuAI only scores moves), so the first search does not pay
+        # for it and it is not started from the game's search thread
+        if self.parallel_workers > 0 and multiprocessing.parent_process() is None:
+            self._get_pool()
+
     def get_best_move(self, board, captures, zobrist_hash, ai_player, win_by_captures,
                      game_logic, num_moves):
         """
@@ -59,7 +202,7 @@ class GomokuAI:
 
         Args:
             board: The current board state
-            captures: Dictionary of captures for each player
+            captures: Captured stone counts, indexed by player
             zobrist_hash: Current Zobrist hash
             ai_player: The AI player number
             win_by_captures: Number of pairs needed to win
@@ -74,40 +217,25 @@ class GomokuAI:
 
         start_time = time.time()
 
-        # Clear transposition table for new move
-        self.algorithm.clear_transposition_table()
+        # New search generation: the transposition table keeps what earlier searches
+        # learned, while the ordering cache (ranked with the history table) is cleared
+        self.algorithm.advance_generation(ai_player)
+        self._ordering_cache.clear()
 
         # Calculate initial board score (only once)
         initial_board_score = self.heuristic.evaluate_board(
             board, captures, ai_player, win_by_captures
         )
 
-        # Create wrapper functions for game logic
-        def ordered_moves_wrapper(board, captures, player):
-            return self.get_ordered_moves(
-                board, captures, player, game_logic, num_moves, win_by_captures
+        # Order the root moves on the worker pool; the search then finds them cached
+        if self.parallel_workers > 0:
+            self.get_ordered_moves(
+                board, captures, ai_player, game_logic, num_moves, win_by_captures,
+                zobrist_hash, parallel=True
             )
 
-        def make_move_wrapper(r, c, player, board, captures, zobrist_hash):
-            return self.make_move_and_get_delta(
-                r, c, player, board, captures, zobrist_hash,
-                game_logic, win_by_captures
-            )
-
-        def undo_move_wrapper(r, c, player, board, captured_pieces,
-                            old_cap_count, captures, zobrist_hash):
-            return game_logic.undo_move(
-                r, c, player, board, captured_pieces, old_cap_count,
-                captures, zobrist_hash
-            )
-
-        def is_legal_wrapper(r, c, player, board):
-            return game_logic.is_legal_move(r, c, player, board)
-
-        def check_terminal_wrapper(board, captures, player, r, c):
-            return game_logic.check_terminal_state(
-                board, captures, player, r, c, win_by_captures
-            )
+        # Everything the search calls back into, held in one context object
+        ctx = GameContext(self, game_logic, num_moves, win_by_captures)
 
         # Perform iterative deepening search with adaptive starting depth
         game_state = (board, captures, zobrist_hash)
@@ -115,17 +243,13 @@ class GomokuAI:
         algo_cfg = self.config["algorithm_settings"]
         if algo_cfg.get("enable_iterative_deepening", True):
             best_move, best_score, depth_reached = self.algorithm.iterative_deepening_search(
-                game_state, ai_player, initial_board_score,
-                ordered_moves_wrapper, make_move_wrapper, undo_move_wrapper,
-                is_legal_wrapper, check_terminal_wrapper, num_moves
+                game_state, ai_player, initial_board_score, ctx
             )
         else:
             # Fixed depth search
             print(f"Iterative deepening disabled. Searching directly at depth {self.max_depth}")
             best_move, best_score = self.algorithm.minimax_root(
-                game_state, ai_player, initial_board_score, self.max_depth,
-                ordered_moves_wrapper, make_move_wrapper, undo_move_wrapper,
-                is_legal_wrapper, check_terminal_wrapper
+                game_state, ai_player, initial_board_score, self.max_depth, ctx
             )
             depth_reached = self.max_depth
 
@@ -139,6 +263,13 @@ class GomokuAI:
 
         return best_move, time_taken
 
+    def clear_transposition_table(self):
+        """Clears the search transposition table and the move ordering caches with it."""
+        self.algorithm.clear_transposition_table()
+        self._ordering_cache.clear()
+        self._delta_cache.clear()
+        self.heuristic.clear_move_pair_cache()
+
     def make_move_and_get_delta(self, r, c, player, board, captures, zobrist_hash,
                                game_logic, win_by_captures):
         """
@@ -148,63 +279,29 @@ class GomokuAI:
         Returns:
             tuple: (delta, captured_pieces, old_capture_count, new_zobrist_hash)
         """
-        opponent = 2 if player == 1 else 1
-
-        # Get score BEFORE the move
-        is_critical_me = captures[player] >= (win_by_captures * 2 - 2)
-        is_critical_opp = captures[opponent] >= (win_by_captures * 2 - 2)
-
-        score_before_me = self.heuristic.score_lines_at(r, c, board, player, opponent, is_critical_me)
-        score_before_opp = self.heuristic.score_lines_at(r, c, board, opponent, player, is_critical_opp)
+        delta_key = (zobrist_hash, r * self.board_size + c, player, captures[1], captures[2])
+        delta = self._delta_cache.get(delta_key)
+        if delta is not None:
+            captured_pieces, new_hash = game_logic.make_move(r, c, player, board, zobrist_hash)
+            return delta, captured_pieces, captures[player], new_hash
+
+        opponent = OPPONENT[player]
+        # One more pair wins by captures from this many captured stones
+        critical_captures = win_by_captures * 2 - 2
+        is_critical_me = captures[player] >= critical_captures
+        is_critical_opp = captures[opponent] >= critical_captures
 
         # Make the move
         captured_pieces, new_hash = game_logic.make_move(
             r, c, player, board, zobrist_hash
         )
 
-        # Get score AFTER the move
-        score_after_me = self.heuristic.score_lines_at(r, c, board, player, opponent, is_critical_me)
-        score_after_opp = self.heuristic.score_lines_at(r, c, board, opponent, player, is_critical_opp)
-
-        # Calculate delta
-        delta_my_lines = score_after_me - score_before_me
-        delta_opp_lines = score_after_opp - score_before_opp
-
-        # Correction for captured stones:
-        # Removing opponent stones changes the score of lines passing through them.
-        # We need to subtract the old score of those lines (where opponent had a stone)
-        # and add the new score (where it's empty).
-        delta_captured_correction = 0
-
-        if captured_pieces:
-            # To acturally reconstruct the "Before" state properly for patterns like 5-in-a-row,
-            # we must restore ALL captured stones at once.
-            # If we only restore one, a 5-in-a-row might look like a broken 4, which has a totally different score.
-
-            # 1. Restore ALL captured stones
-            for (cr, cc) in captured_pieces:
-                cap_idx = cr * self.board_size + cc
-                board[cap_idx] = opponent
-
-            # 2. Calculate "Before" score for all captured stones
-            # We sum the score contributions. Note that this might double-count the shared axis line,
-            # but that's consistent with how we will calculate the "After" score below.
-            score_caps_before = 0
-            for (cr, cc) in captured_pieces:
-                score_caps_before += self.heuristic.score_lines_at(cr, cc, board, opponent, player, is_critical_opp)
-
-            # 3. Remove ALL captured stones (Re-empty)
-            for (cr, cc) in captured_pieces:
-                cap_idx = cr * self.board_size + cc
-                board[cap_idx] = 0
-
-            # 4. Calculate "After" score for all captured stones (now empty)
-            score_caps_after = 0
-            for (cr, cc) in captured_pieces:
-                score_caps_after += self.heuristic.score_lines_at(cr, cc, board, opponent, player, is_critical_opp)
-
-            # 5. Delta
-            delta_captured_correction = score_caps_after - score_caps_before
+        # Line deltas around the new stone and the captured stones.
+        # The "before" windows are patched from the "after" ones, so every
+        # window is gathered once and the board is never restored.
+        delta_my_lines, delta_opp_lines, delta_captured_correction = self.heuristic.score_move_delta(
+            r, c, board, player, opponent, captured_pieces, is_critical_me, is_critical_opp
+        )
 
         # Delta from captures count (Bonus)
         old_capture_count = captures[player]
@@ -222,8 +319,109 @@ class GomokuAI:
 
         delta = (delta_my_lines + delta_my_captures) - (total_opp_delta * 1.1)
 
+        if len(self._delta_cache) >= self.max_delta_cache_size:
+            self._delta_cache.clear()
+        self._delta_cache[delta_key] = delta
+
         return delta, captured_pieces, old_capture_count, new_hash
 
+    def _init_line_sweeps(self):
+        """
+        Build, for each of the 4 directions, the layout of all board lines laid end
+        to end with a boundary cell between them, and a gatherer for that layout.
+        The boundary is index n*n, one past the board (see _SWEEP_BOUNDARY).
+        Each line is also kept on its own for incremental re-sweeps, as a strided
+        slice of the flat board plus its layout (bounded on both sides), with the
+        (direction, line) keys of every cell and the line number of every layout position.
+        """
+        n = self.board_size
+        boundary = n * n
+        self._line_sweeps = []
+        self._sweep_lines = []
+        cell_keys = [[] for _ in range(n * n)]
+        for d, (dr, dc) in enumerate(DIRECTIONS_4):
+            layout = [boundary]
+            layout_lines = [-1]
+            lines = []
+            for r in range(n):
+                for c in range(n):
+                    # Lines start at the cells with no predecessor in this direction
+                    if 0 <= r - dr < n and 0 <= c - dc < n:
+                        continue
+                    line_id = len(lines)
+                    line_layout = [boundary]
+                    nr, nc = r, c
+                    while 0 <= nr < n and 0 <= nc < n:
+                        line_layout.append(nr * n + nc)
+                        cell_keys[nr * n + nc].append((d, line_id))
+                        nr += dr
+                        nc += dc
+                    line_layout.append(boundary)
+                    cells = slice(line_layout[1], line_layout[-2] + 1, dr * n + dc)
+                    lines.append((cells, tuple(line_layout)))
+                    layout.extend(line_layout[1:])
+                    layout_lines.extend([line_id] * (len(line_layout) - 1))
+            self._line_sweeps.append((itemgetter(*layout), tuple(layout), tuple(layout_lines)))
+            self._sweep_lines.append(tuple(lines))
+        self._cell_line_keys = tuple(tuple(keys) for keys in cell_keys)
+
+    def _update_line_runs(self, cells):
+        """
+        Brings _critical_line_runs up to date with cells (the board plus a trailing
+        boundary byte) and returns it: (direction, line) -> runs of 3+ same-colour
+        stones on that line, as (stone, run_length, run_cells, empty_end_cells).
+        Only lines through cells changed since the previous call are re-swept.
+        """
+        line_runs = self._critical_line_runs
+        previous = self._critical_cells
+        self._critical_cells = cells
+
+        if previous is not None:
+            changed = np.flatnonzero(np.frombuffer(cells, dtype=np.uint8)
+                                     != np.frombuffer(previous, dtype=np.uint8))
+            if len(changed) <= self.critical_rescan_limit:
+                dirty = set()
+                for idx in changed.tolist():
+                    dirty.update(self._cell_line_keys[idx])
+                for d, line_id in dirty:
+                    line_cells, layout = self._sweep_lines[d][line_id]
+                    line = _SWEEP_BOUNDARY + cells[line_cells] + _SWEEP_BOUNDARY
+                    runs = []
+                    for match in _RUN_OF_THREE.finditer(line):
+                        run = self._line_run(line, layout, *match.span())
+                        if run is not None:
+                            runs.append(run)
+                    if runs:
+                        line_runs[(d, line_id)] = runs
+                    elif (d, line_id) in line_runs:
+                        del line_runs[(d, line_id)]
+                return line_runs
+
+        # Full sweep: all lines of a direction at once, runs split by line number
+        line_runs.clear()
+        for d, (gather, layout, layout_lines) in enumerate(self._line_sweeps):
+            line = bytes(gather(cells))
+            for match in _RUN_OF_THREE.finditer(line):
+                run_start, run_end = match.span()
+                run = self._line_run(line, layout, run_start, run_end)
+                if run is not None:
+                    line_runs.setdefault((d, layout_lines[run_start]), []).append(run)
+        return line_runs
+
+    @staticmethod
+    def _line_run(line, layout, run_start, run_end):
+        """
+        Run entry for the stones line[run_start:run_end] of a swept line: 5+ runs
+        keep their cells, shorter runs their empty ends (None if both are blocked).
+        """
+        stone = line[run_start]
+        if run_end - run_start >= 5:
+            return stone, run_end - run_start, layout[run_start:run_end], ()
+        ends = [layout[i] for i in (run_start - 1, run_end) if line[i] == 0]
+        if not ends:
+            return None
+        return stone, run_end - run_start, None, ends
+
     def _find_critical_moves(self, board, player):
         """
         Find critical moves: positions that complete or block 4-in-a-row.
@@ -231,264 +429,244 @@ class GomokuAI:
         These moves MUST always be considered regardless of windowing.
 
         Returns:
-            tuple: (winning_positions, blocking_positions)
+            tuple: (winning_positions, blocking_positions) as sets of (row, col).
+            They are scratch buffers, overwritten by the next call.
         """
-        winning_positions = set()
-        blocking_positions = set()
-
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        opponent = 2 if player == 1 else 1
-
-        # First, detect 5-in-a-row threats from opponent
-        # Use same logic as check_win but check for opponent pieces
-        opponent_five_lines = []  # List of line_coords sets
-        seen_lines = set()  # Track lines we've already found
-        
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                idx = r * self.board_size + c
-                if board[idx] != opponent:
-                    continue
-
-                # Check all 4 directions for 5-in-a-row (same as check_win)
-                for dr, dc in directions:
-                    line_coords = [(r, c)]
-                    
-                    # Check forward
-                    for i in range(1, 5):
-                        nr, nc = r + dr * i, c + dc * i
-                        if not (0 <= nr < self.board_size and 0 <= nc < self.board_size):
-                            break
-                        n_idx = nr * self.board_size + nc
-                        if board[n_idx] == opponent:
-                            line_coords.append((nr, nc))
-                        else:
-                            break
-                    
-                    # Check backward
-                    for i in range(1, 5):
-                        nr, nc = r - dr * i, c - dc * i
-                        if not (0 <= nr < self.board_size and 0 <= nc < self.board_size):
-                            break
-                        n_idx = nr * self.board_size + nc
-                        if board[n_idx] == opponent:
-                            line_coords.insert(0, (nr, nc))
-                        else:
-                            break
-                    
-                    # If we have 5 or more in a row, this is a pending win threat
-                    if len(line_coords) >= 5:
-                        # Use sorted tuple as key to avoid duplicates
-                        line_key = tuple(sorted(line_coords))
-                        if line_key not in seen_lines:
-                            seen_lines.add(line_key)
-                            opponent_five_lines.append(line_coords)
-
-        # For each opponent 5-in-a-row, find capture moves that break it
-        # We check all empty positions near the line to see if playing there captures pieces in the line
-        for line_coords in opponent_five_lines:
-            line_set = set(line_coords)  # For fast lookup
-            
-            # Check all empty positions within 3 squares of any position in the line
-            checked_positions = set()
-            for r_line, c_line in line_coords:
-                # Check positions in a 7x7 area around each position in the line
-                for dr_check in range(-3, 4):
-                    for dc_check in range(-3, 4):
-                        r_check = r_line + dr_check
-                        c_check = c_line + dc_check
-                        
-                        if not (0 <= r_check < self.board_size and 0 <= c_check < self.board_size):
-                            continue
-                        
-                        idx_check = r_check * self.board_size + c_check
-                        if board[idx_check] != 0:
-                            continue  # Not empty
-                        
-                        if (r_check, c_check) in checked_positions:
-                            continue
-                        checked_positions.add((r_check, c_check))
-                        
-                        # Check if playing here would capture any pieces in the 5-in-a-row
-                        captured = self._get_capture_positions(r_check, c_check, player, board)
-                        if captured:
-                            # Check if any captured piece is part of the 5-in-a-row
-                            for cap_r, cap_c in captured:
-                                if (cap_r, cap_c) in line_set:
-                                    blocking_positions.add((r_check, c_check))
-                                    break  # Found a capture that breaks the line
-
-        # Now detect 4-in-a-row and 3-in-a-row threats (original logic)
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                idx = r * self.board_size + c
-                if board[idx] == 0:
-                    continue
-
-                current_player = board[idx]
-
-                # Check all 4 directions for potential 4-in-a-row
-                for dr, dc in directions:
-                    count = 1
-                    empty_positions = []
-
-                    # Look forward: count consecutive stones, note first empty
-                    nr, nc = r + dr, c + dc
-                    found_empty_forward = False
-                    for _ in range(4):
-                        if not (0 <= nr < self.board_size and 0 <= nc < self.board_size):
-                            break
-                        n_idx = nr * self.board_size + nc
-                        if board[n_idx] == current_player:
-                            count += 1
-                        elif board[n_idx] == 0 and not found_empty_forward:
-                            # Only add the FIRST empty square (adjacent to the run)
-                            empty_positions.append((nr, nc))
-                            found_empty_forward = True
-                            break  # Stop after first empty
-                        else:
-                            break  # Hit opponent or second empty
-                        nr += dr
-                        nc += dc
-
-                    # Look backward: count consecutive stones, note first empty
-                    nr, nc = r - dr, c - dc
-                    found_empty_backward = False
-                    for _ in range(4):
-                        if not (0 <= nr < self.board_size and 0 <= nc < self.board_size):
-                            break
-                        n_idx = nr * self.board_size + nc
-                        if board[n_idx] == current_player:
-                            count += 1
-                        elif board[n_idx] == 0 and not found_empty_backward:
-                            # Only add the FIRST empty square (adjacent to the run)
-                            empty_positions.append((nr, nc))
-                            found_empty_backward = True
-                            break  # Stop after first empty
-                        else:
-                            break  # Hit opponent or second empty
-                        nr -= dr
-                        nc -= dc
-
-                    # Critical moves: 4-in-a-row (immediate) or 3-in-a-row with 2 open ends (dangerous)
-                    #
-                    # 4-in-a-row cases:
-                    # - O-X-X-X-X-E (1 empty, blocked on one side)
-                    # - E-X-X-X-X-E (2 empties, open on both sides - BOTH are critical!)
-                    #
-                    # 3-in-a-row cases (only if open on both ends):
-                    # - E-X-X-X-E (2 empties, open three - very dangerous!)
-                    if count == 4 and len(empty_positions) >= 1:
-                        for critical_pos in empty_positions:
-                            if current_player == player:
-                                winning_positions.add(critical_pos)
-                            else:
-                                blocking_positions.add(critical_pos)
-                    elif count == 3 and len(empty_positions) == 2:
-                        # Open three: both ends are empty, very dangerous!
-                        for critical_pos in empty_positions:
-                            if current_player == player:
-                                winning_positions.add(critical_pos)
-                            else:
-                                blocking_positions.add(critical_pos)
-
-        return list(winning_positions), list(blocking_positions)
-
-    def get_ordered_moves(self, board, captures, player, game_logic, num_moves, win_by_captures=5):
+        winning_positions, blocking_positions = self._critical_buffers
+        winning_positions.clear()
+        blocking_positions.clear()
+
+        opponent = OPPONENT[player]
+        n = self.board_size
+
+        # Maximal runs of 3+ same-colour stones on every line of the board, in each
+        # of the 4 directions (see _update_line_runs). A run of 5+ is a 5-in-a-row;
+        # runs of 3 or 4 with an empty end are kept as threats.
+        cells = bytes(board) + _SWEEP_BOUNDARY
+        opponent_five_cells = self._five_cells_buffer  # Flat indices of opponent 5-in-a-row stones
+        opponent_five_cells.clear()
+        threat_runs = self._threat_runs_buffer  # (stone, run_length, empty end indices)
+        threat_runs.clear()
+
+        for runs in self._update_line_runs(cells).values():
+            for stone, run_length, run_cells, ends in runs:
+                if run_cells is not None:
+                    if stone == opponent:
+                        opponent_five_cells.extend(run_cells)
+                else:
+                    threat_runs.append((stone, run_length, ends))
+
+        # For each opponent 5-in-a-row, find capture moves that break it: empty cells
+        # where we capture a pair (P-O-O-P) that includes a stone of the line.
+        # Done on bitboards (see _get_capture_maps) for all lines at once.
+        if opponent_five_cells:
+            row_stride = n + 1
+            empty, stones = self._get_bitboards(board)
+            own, opp = stones[player], stones[opponent]
+            bitboard_shift = self._bitboard_shift
+            five = 0
+            for idx in opponent_five_cells:
+                five |= 1 << bitboard_shift[idx]
+            breaks = 0
+            for step in self._capture_shifts:
+                # Pair ahead of the cell, then behind it
+                breaks |= ((opp >> step) & (opp >> 2 * step) & (own >> 3 * step)
+                           & ((five >> step) | (five >> 2 * step)))
+                breaks |= ((opp << step) & (opp << 2 * step) & (own << 3 * step)
+                           & ((five << step) | (five << 2 * step)))
+            breaks &= empty
+            if breaks:
+                break_cells = breaks.to_bytes(self._bitboard_len, 'little')
+                for bit in np.flatnonzero(np.frombuffer(break_cells, dtype=np.uint8)).tolist():
+                    r_break, c_break = divmod(bit, row_stride)
+                    if c_break < n:  # Skip the always-empty guard cells
+                        blocking_positions.add((r_break, c_break))
+
+        # Now add the 4-in-a-row and 3-in-a-row threats
+        #
+        # 4-in-a-row cases:
+        # - O-X-X-X-X-E (1 empty, blocked on one side)
+        # - E-X-X-X-X-E (2 empties, open on both sides - BOTH are critical!)
+        #
+        # 3-in-a-row cases (only if open on both ends):
+        # - E-X-X-X-E (2 empties, open three - very dangerous!)
+        for stone, run_length, ends in threat_runs:
+            if run_length == 4 or len(ends) == 2:
+                target = winning_positions if stone == player else blocking_positions
+                for critical_idx in ends:
+                    target.add(divmod(critical_idx, n))
+
+        return winning_positions, blocking_positions
+
+    def get_ordered_moves(self, board, captures, player, game_logic, num_moves, win_by_captures=5,
+                          zobrist_hash=None, hash_move=None, parallel=False):
         """
         Gets moves ordered by their local score (for move ordering optimization).
         Uses static evaluation for fast initial sorting.
+
+        When zobrist_hash is given, the result is cached for the position so that
+        re-visits (e.g. each iterative deepening iteration) skip the evaluation.
+        hash_move (the best move stored in the transposition table) is placed first.
+        All other moves are empty and legal for player (double-three rule included),
+        so callers only need to check hash_move.
+        parallel=True scores the candidates on the worker pool (used at the root).
         """
-        opponent = 2 if player == 1 else 1
-        is_critical_attack = captures[player] >= (win_by_captures * 2 - 2)
-        is_critical_defend = captures[opponent] >= (win_by_captures * 2 - 2)
+        if zobrist_hash is None:
+            ordered_moves = self._compute_ordered_moves(board, captures, player, game_logic, num_moves,
+                                                        win_by_captures, parallel)
+        else:
+            cache_key = (zobrist_hash, captures[1], captures[2], player)
+            ordered_moves = self._ordering_cache.get(cache_key)
+            if ordered_moves is not None:
+                self._ordering_cache.move_to_end(cache_key)
+            else:
+                ordered_moves = self._compute_ordered_moves(board, captures, player, game_logic, num_moves,
+                                                            win_by_captures, parallel)
+                self._ordering_cache[cache_key] = ordered_moves
+                if len(self._ordering_cache) > self.ordering_cache_size:
+                    self._ordering_cache.popitem(last=False)
+
+        if hash_move is None or (ordered_moves and ordered_moves[0] == hash_move):
+            return ordered_moves
+        # Copy so the cached list keeps its static order
+        return [hash_move] + [move for move in ordered_moves if move != hash_move]
+
+    def _compute_ordered_moves(self, board, captures, player, game_logic, num_moves, win_by_captures,
+                               parallel=False):
+        """Evaluates and orders the candidate moves of a position (uncached)."""
+        opponent = OPPONENT[player]
+        # One more pair wins by captures from this many captured stones
+        critical_captures = win_by_captures * 2 - 2
+        is_critical_attack = captures[player] >= critical_captures
+        is_critical_defend = captures[opponent] >= critical_captures
 
         # Find critical moves (winning/blocking 4-in-a-row)
         winning_positions, blocking_positions = self._find_critical_moves(board, player)
 
+        # Only the winning and blocking tiers are returned when either is non-empty
+        # (see _select_final_moves), so the other candidates are never generated.
+        # With a capture win possible every candidate is still checked below.
+        critical_only = bool(winning_positions or blocking_positions) and not is_critical_attack
+        if critical_only:
+            legal_moves = sorted(winning_positions | blocking_positions)
+        else:
+            # Get all candidate moves (relevant moves plus winning/blocking positions)
+            legal_moves = self._get_candidate_moves(board, num_moves, winning_positions, blocking_positions)
+
+        # Cells where either side would capture, computed once for all candidates
+        capture_maps = self._get_capture_maps(board)
+        bitboard_row_ofs = self._bitboard_row_ofs
+        # Capture positions found while ordering this position, shared by the
+        # capture-win check and the capture scores (the board does not change)
+        capture_cache = {}
+
         # Also detect capture wins as winning moves
-        # We need to check ALL candidate moves (before filtering) to find capture wins
+        # We need to check ALL candidate moves (before filtering) to find capture wins.
+        # Capture wins are candidates already, so legal_moves stays complete.
         if is_critical_attack:
-            # Get all candidate moves first (using empty winning/blocking to get full set)
-            all_candidate_moves = self.get_relevant_moves_windowed(board, num_moves)
-            # Also include any already-found winning/blocking positions
-            all_candidate_moves_set = set(all_candidate_moves)
-            all_candidate_moves_set.update(winning_positions)
-            all_candidate_moves_set.update(blocking_positions)
-
             # Check each candidate move for capture win
-            for r, c in all_candidate_moves_set:
-                if (r, c) not in winning_positions:
+            for r, c in legal_moves:
+                if (r, c) not in winning_positions and capture_maps[player][bitboard_row_ofs[r] + c]:
                     # Check if this move would capture enough to win
-                    capture_positions = self._get_capture_positions(r, c, player, board)
+                    capture_positions = self._get_capture_positions(r, c, player, board, capture_cache)
                     if capture_positions:
                         # This move captures pieces
                         # If we have 8 captures and capture 2 more, we win
                         new_capture_count = captures[player] + len(capture_positions)
                         if new_capture_count >= (win_by_captures * 2):
-                            winning_positions.append((r, c))
+                            winning_positions.add((r, c))
 
-        # Get all candidate moves (now including capture wins in winning_positions)
-        legal_moves = self._get_candidate_moves(board, num_moves, winning_positions, blocking_positions)
+            # Same short-circuit as above, once the capture wins are known
+            if winning_positions or blocking_positions:
+                critical_only = True
+                legal_moves = [move for move in legal_moves
+                               if move in winning_positions or move in blocking_positions]
 
         # Evaluate and categorize all moves
         move_tiers = self._evaluate_and_categorize_moves(
             legal_moves, board, player, opponent, game_logic,
             is_critical_attack, is_critical_defend,
-            winning_positions, blocking_positions
+            winning_positions, blocking_positions, parallel, capture_maps, capture_cache
         )
 
+        # Every critical move can be illegal (double-three): the winning and blocking
+        # tiers are then empty and the other candidates are ranked as usual
+        if critical_only and not (move_tiers['winning'] or move_tiers['blocking']):
+            legal_moves = self._get_candidate_moves(board, num_moves, winning_positions, blocking_positions)
+            move_tiers = self._evaluate_and_categorize_moves(
+                legal_moves, board, player, opponent, game_logic,
+                is_critical_attack, is_critical_defend,
+                winning_positions, blocking_positions, parallel, capture_maps, capture_cache
+            )
+
         # Select final moves based on game phase and priorities
         return self._select_final_moves(move_tiers, num_moves)
 
     def _get_candidate_moves(self, board, num_moves, winning_positions, blocking_positions):
         """Get all candidate moves including critical positions."""
-        legal_moves = self.get_relevant_moves_windowed(board, num_moves)
-        critical_moves = set(winning_positions + blocking_positions)
-        legal_moves_set = set(legal_moves)
-        legal_moves_set.update(critical_moves)
-        return list(legal_moves_set)
-
-    def _evaluate_move_score(self, r, c, board, player, opponent,
-                            is_critical_attack, is_critical_defend):
+        # Critical positions are OR-ed into the relevance mask, which dedupes them
+        mask = self._relevant_mask_windowed(board, num_moves)
+        row_ofs = self._row_ofs
+        for r, c in chain(winning_positions, blocking_positions):
+            mask[row_ofs[r] + c] = True
+        return self._mask_to_moves(mask)
+
+    def _mask_to_moves(self, mask):
+        """Converts a flat boolean board mask to a list of (row, col) moves."""
+        n = self.board_size
+        return [divmod(idx, n) for idx in np.flatnonzero(mask).tolist()]
+
+    def _evaluate_moves_batch(self, moves, board, player, opponent,
+                              is_critical_attack, is_critical_defend, capture_maps=None,
+                              capture_cache=None):
         """
-        Evaluate a single move and return its total score.
-        Returns: (score_attack, score_defend, capture_score, total_score)
+        Evaluate a batch of legal empty moves and return their total scores.
+        The line scores of the whole batch come from one heuristic call.
+        capture_maps (see _get_capture_maps) lets the capture check skip cells
+        where no capture is possible; capture_cache is passed on to
+        _get_capture_positions.
+        Returns: list of (r, c, score_attack, score_defend, total_score), in order
         """
-        idx = r * self.board_size + c
-
-        # Score offensive potential
-        board[idx] = player
-        score_attack = self.heuristic.score_lines_at(r, c, board, player, opponent, is_critical_attack)
-        board[idx] = 0
-
-        # Score defensive value
-        board[idx] = opponent
-        score_defend = self.heuristic.score_lines_at(r, c, board, opponent, player, is_critical_defend)
-        board[idx] = 0
-
-        # Evaluate capture potential
-        capture_score = self._evaluate_capture_score(
-            r, c, player, opponent, board, is_critical_attack, is_critical_defend
+        # Score offensive potential (our stone here) and defensive value (theirs) in one pass
+        line_scores = self.heuristic.score_moves_pair(
+            moves, board, player, opponent, is_critical_attack, is_critical_defend
         )
+        get_history_score = self.algorithm.get_history_score
+        results = []
+
+        for (r, c), (score_attack, score_defend) in zip(moves, line_scores, strict=True):
+            # Evaluate capture potential
+            capture_score = self._evaluate_capture_score(
+                r, c, player, opponent, board, is_critical_attack, is_critical_defend, capture_maps,
+                capture_cache
+            )
 
-        # Combine scores
-        total_score = score_attack + score_defend + capture_score
+            # Combine scores
+            total_score = score_attack + score_defend + capture_score
 
-        # Add history heuristic bonus
-        history_score = self.algorithm.get_history_score(r, c)
-        if history_score > 0:
-            total_score += min(history_score, 5000)
+            # Add history heuristic bonus
+            history_score = get_history_score(r, c)
+            if history_score > 0:
+                total_score += min(history_score, 5000)
 
-        return score_attack, score_defend, capture_score, total_score
+            results.append((r, c, score_attack, score_defend, total_score))
+
+        return results
 
     def _evaluate_capture_score(self, r, c, player, opponent, board,
-                               is_critical_attack, is_critical_defend):
+                               is_critical_attack, is_critical_defend, capture_maps=None,
+                               capture_cache=None):
         """Evaluate capture opportunities and threats for a move."""
         capture_score = 0
+        if capture_maps is not None:
+            bit = self._bitboard_row_ofs[r] + c
+            can_capture = capture_maps[player][bit]
+            can_be_captured = capture_maps[opponent][bit]
+        else:
+            can_capture = can_be_captured = True
 
         # Can we capture with this move?
-        captures_by_me = self._get_capture_positions(r, c, player, board)
+        captures_by_me = can_capture and self._get_capture_positions(r, c, player, board, capture_cache)
         if captures_by_me:
             if is_critical_attack:
                 capture_score += self.WIN_SCORE
@@ -496,7 +674,7 @@ class GomokuAI:
                 capture_score += len(captures_by_me) // 2 * self.CAPTURE_SCORE
 
         # Does this block an opponent capture?
-        captures_by_opp = self._get_capture_positions(r, c, opponent, board)
+        captures_by_opp = can_be_captured and self._get_capture_positions(r, c, opponent, board, capture_cache)
         if captures_by_opp:
             if is_critical_defend:
                 capture_score += self.WIN_SCORE
@@ -507,47 +685,91 @@ class GomokuAI:
 
     def _evaluate_and_categorize_moves(self, legal_moves, board, player, opponent,
                                       game_logic, is_critical_attack, is_critical_defend,
-                                      winning_positions, blocking_positions):
+                                      winning_positions, blocking_positions, parallel=False,
+                                      capture_maps=None, capture_cache=None):
         """
         Evaluate all legal moves and categorize them into priority tiers.
-        Returns: dict of move tiers (winning, blocking, high, mid, low priority)
+        Returns: dict of unsorted move tiers (winning, blocking, high, mid, low priority).
+        The tier lists are scratch buffers, overwritten by the next call.
         """
-        tiers = {
-            'winning': [],
-            'blocking': [],
-            'high_priority': [],
-            'mid_priority': [],
-            'low_priority': []
-        }
-
-        for (r, c) in legal_moves:
-            # Skip occupied squares
-            idx = r * self.board_size + c
-            if board[idx] != 0:
-                continue
-
-            # Check legality (double-three rule)
-            is_legal, _ = game_logic.is_legal_move(r, c, player, board)
-            if not is_legal:
-                continue
-
-            # Evaluate move
-            score_attack, score_defend, _, total_score = self._evaluate_move_score(
-                r, c, board, player, opponent, is_critical_attack, is_critical_defend
+        tiers = self._tier_buffers
+        for tier in tiers.values():
+            tier.clear()
+
+        if capture_maps is None:
+            capture_maps = self._get_capture_maps(board)
+        # Cells that can be a double-three at all, computed once for all candidates
+        _, stones = self._get_bitboards(board)
+        maybe_double_three = self._get_double_three_map(stones[player])
+
+        if parallel and self.parallel_workers > 0 and len(legal_moves) >= self.parallel_min_moves:
+            scored_moves = self._evaluate_moves_parallel(
+                legal_moves, board, player, is_critical_attack, is_critical_defend,
+                capture_maps, maybe_double_three
+            )
+        else:
+            row_ofs = self._row_ofs
+            bitboard_row_ofs = self._bitboard_row_ofs
+            # Skip occupied squares, and check legality (double-three rule) where it can fail
+            playable = [
+                (r, c) for (r, c) in legal_moves
+                if board[row_ofs[r] + c] == 0
+                and (not maybe_double_three[bitboard_row_ofs[r] + c]
+                     or game_logic.is_legal_move(r, c, player, board)[0])
+            ]
+            scored_moves = self._evaluate_moves_batch(
+                playable, board, player, opponent, is_critical_attack, is_critical_defend,
+                capture_maps, capture_cache
             )
 
-            # Categorize into appropriate tier
+        # Categorize into appropriate tiers
+        for r, c, score_attack, score_defend, total_score in scored_moves:
             self._categorize_move(
                 r, c, total_score, score_attack, score_defend,
                 winning_positions, blocking_positions, tiers
             )
 
-        # Sort all tiers by score
-        for tier in tiers.values():
-            tier.sort(reverse=True)
-
+        # Tiers are left unsorted: _select_final_moves only takes the top few of each
         return tiers
 
+    def _get_pool(self):
+        """
+        Returns the move ordering worker pool, starting it if needed. Workers are
+        spawned rather than forked: forking a process that runs other threads (the
+        game searches on one) can deadlock the child.
+        """
+        if self._pool is None:
+            self._pool = multiprocessing.get_context("spawn").Pool(
+                self.parallel_workers, initializer=_init_ordering_worker, initargs=(self.config,)
+            )
+        return self._pool
+
+    def close_pool(self):
+        """Shuts down the move ordering worker pool, if it was started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def _evaluate_moves_parallel(self, legal_moves, board, player,
+                                 is_critical_attack, is_critical_defend,
+                                 capture_maps, maybe_double_three):
+        """
+        Scores candidate moves across the worker pool, one chunk per worker.
+        Scoring never writes to the board, so all chunks share one board snapshot,
+        and the whole-board capture and double-three maps are computed here once.
+        Returns: list of (r, c, score_attack, score_defend, total_score) for the legal moves
+        """
+        board_bytes = bytes(board)
+        row_ofs = self._row_ofs
+        empty_moves = [(r, c) for (r, c) in legal_moves if board[row_ofs[r] + c] == 0]
+        chunks = [empty_moves[i::self.parallel_workers] for i in range(self.parallel_workers)]
+        results = self._get_pool().starmap(_score_candidates_chunk, [
+            (board_bytes, chunk, player, is_critical_attack, is_critical_defend,
+             self.algorithm.history_table, capture_maps, maybe_double_three)
+            for chunk in chunks if chunk
+        ])
+        return list(chain.from_iterable(results))
+
     def _categorize_move(self, r, c, total_score, score_attack, score_defend,
                         winning_positions, blocking_positions, tiers):
         """Categorize a move into the appropriate priority tier."""
@@ -581,114 +803,132 @@ class GomokuAI:
         4. Our threats (4-in-a-row)
         5. Other moves
         """
-        move_ordering_cfg = self.config["ai_settings"]["move_ordering"]
-        adaptive_cfg = move_ordering_cfg["adaptive_move_limits"]
-        priority_cfg = move_ordering_cfg["priority_move_limits"]
-
-        win_limit = priority_cfg.get("winning_moves", 5)
-        block_limit = priority_cfg.get("blocking_moves", 6)
+        win_limit = self.win_move_limit
+        block_limit = self.block_move_limit
 
+        # Tiers arrive unsorted; heapq.nlargest(k, tier) equals sorted(tier, reverse=True)[:k]
+        # but only keeps a k-sized heap, which matters for the large low-priority tier
         # CRITICAL: If opponent has multiple blocking positions (open four),
         # they can win on EITHER side next move - MUST block!
         if tiers['blocking'] and len(tiers['blocking']) >= 2:
             # Open four/threat - blocking takes ABSOLUTE priority
-            result = [move for score, move in tiers['blocking'][:block_limit]]
+            result = [move for score, move in heapq.nlargest(block_limit, tiers['blocking'])]
             # Maybe add one winning move as backup
             if tiers['winning']:
-                result.extend([move for score, move in tiers['winning'][:1]])
+                result.append(max(tiers['winning'])[1])
             return result
 
         # Normal case: both winning and blocking, but winning first
         if tiers['winning'] or tiers['blocking']:
-            result = []
-
-            # Add winning moves first
-            if tiers['winning']:
-                result.extend([move for score, move in tiers['winning'][:win_limit]])
-
-            # Add blocking moves
-            if tiers['blocking']:
-                result.extend([move for score, move in tiers['blocking'][:block_limit]])
-
-            # Limit total to avoid explosion
-            return result[:max(win_limit, block_limit)]
-
-        # If only winning moves (no immediate threats to block)
-        if tiers['winning']:
-            limit = priority_cfg.get("winning_moves", 5)
-            return [move for score, move in tiers['winning'][:limit]]
+            # Winning moves first, then blocking moves; limit total to avoid explosion
+            candidates = chain(heapq.nlargest(win_limit, tiers['winning']),
+                               heapq.nlargest(block_limit, tiers['blocking']))
+            return [move for _, move in islice(candidates, max(win_limit, block_limit))]
 
         # Normal game: combine tiers based on game phase
-        max_moves = self._get_move_limit_for_phase(num_moves, adaptive_cfg)
+        max_moves = self._get_move_limit_for_phase(num_moves)
 
-        result = []
-        result.extend([move for score, move in tiers['high_priority']])
-
-        if len(result) < max_moves:
-            result.extend([move for score, move in tiers['mid_priority']])
-
-        if len(result) < max_moves:
-            result.extend([move for score, move in tiers['low_priority']])
-
-        return result[:max_moves]
+        # Tiers are chained lazily: a lower tier is only ranked if the ones above
+        # it hold fewer than max_moves moves
+        candidates = chain.from_iterable(
+            heapq.nlargest(max_moves, tiers[tier_name])
+            for tier_name in ('high_priority', 'mid_priority', 'low_priority')
+        )
+        return [move for _, move in islice(candidates, max_moves)]
 
-    def _get_move_limit_for_phase(self, num_moves, adaptive_cfg):
+    def _get_move_limit_for_phase(self, num_moves):
         """Determine maximum moves to consider based on game phase."""
-        if num_moves < adaptive_cfg.get("early_game_moves", 10):
-            return adaptive_cfg.get("early_game_limit", 18)
-        elif num_moves < adaptive_cfg.get("mid_game_moves", 25):
-            return adaptive_cfg.get("mid_game_limit", 14)
-        else:
-            return adaptive_cfg.get("late_game_limit", 12)
+        for phase_end, move_limit in self.phase_move_limits:
+            if num_moves < phase_end:
+                return move_limit
+        return self.late_game_move_limit
 
     def get_piece_clusters(self, board, separation_dist=4):
         """
         Identifies clusters of pieces to form multiple bounding boxes.
+        Pieces closer than separation_dist (Chebyshev distance) share a cluster.
         Returns list of (min_r, max_r, min_c, max_c) tuples.
         """
-        pieces = []
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                if board[r * self.board_size + c] != 0:
-                    pieces.append((r, c))
-
-        if not pieces:
+        stones = np.flatnonzero(np.frombuffer(board, dtype=np.uint8))
+        if stones.size == 0:
             return []
+        rows, cols = np.divmod(stones, self.board_size)
 
+        # A few stones are clustered faster by a plain BFS than by array setup
+        if stones.size < self.cluster_bfs_max_stones:
+            return self._get_piece_clusters_bfs(
+                list(zip(rows.tolist(), cols.tolist(), strict=True)), separation_dist
+            )
+
+        # Connected components of the "within separation_dist" graph: transitive
+        # closure of the adjacency matrix by repeated squaring (path length doubles
+        # each round), then every stone is labelled by the first stone it reaches.
+        # The adjacency matrix is cut out of the precomputed cell-to-cell table.
+        reach = self._get_near_table(separation_dist)[stones][:, stones].astype(np.float32)
+        while True:
+            closure = (reach @ reach > 0).astype(np.float32)
+            if np.array_equal(closure, reach):
+                break
+            reach = closure
+        labels = reach.argmax(axis=1)
+
+        # Per-cluster bounding boxes: group the stones by label, then reduce each
+        # group's rows and columns in one call per bound
+        order = np.argsort(labels, kind='stable')
+        labels = labels[order]
+        starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+        rows = rows[order]
+        cols = cols[order]
+        return list(zip(np.minimum.reduceat(rows, starts).tolist(),
+                        np.maximum.reduceat(rows, starts).tolist(),
+                        np.minimum.reduceat(cols, starts).tolist(),
+                        np.maximum.reduceat(cols, starts).tolist(), strict=True))
+
+    def _get_near_table(self, separation_dist):
+        """Cell x cell boolean table: Chebyshev distance <= separation_dist (cached)."""
+        table = self._near_tables.get(separation_dist)
+        if table is None:
+            rows, cols = np.divmod(np.arange(self.board_size * self.board_size), self.board_size)
+            table = ((np.abs(rows[:, None] - rows[None, :]) <= separation_dist) &
+                     (np.abs(cols[:, None] - cols[None, :]) <= separation_dist))
+            self._near_tables[separation_dist] = table
+        return table
+
+    def _get_piece_clusters_bfs(self, pieces, separation_dist):
+        """Clusters a short list of (row, col) pieces by BFS (see get_piece_clusters)."""
         # Simple clustering
         clusters = []
         unvisited = set(pieces)
 
         while unvisited:
-            # Start a new cluster
+            # Start a new cluster; its bbox grows as stones are reached
             start_node = unvisited.pop()
-            cluster = {start_node}
-            queue = [start_node]
+            min_r = max_r = start_node[0]
+            min_c = max_c = start_node[1]
+            queue = deque([start_node])
 
             # BFS to find connected components within separation_dist
             while queue:
-                r, c = queue.pop(0)
+                r, c = queue.popleft()
 
                 # Find neighbors in unvisited
-                # Optimization: if unvisited is large, this is O(N^2).
-                # But N (stones) <= 361. Usually < 50 in early game.
-                # For 361 stones, simple loop is fine.
-                to_remove = []
-                for target in unvisited:
+                reached = [
+                    (tr, tc) for (tr, tc) in unvisited
+                    if abs(tr - r) <= separation_dist and abs(tc - c) <= separation_dist
+                ]
+                for target in reached:
+                    unvisited.remove(target)
+                    queue.append(target)
                     tr, tc = target
-                    if abs(tr - r) <= separation_dist and abs(tc - c) <= separation_dist:
-                        cluster.add(target)
-                        queue.append(target)
-                        to_remove.append(target)
-
-                for item in to_remove:
-                    unvisited.remove(item)
-
-            # Calculate bbox for this cluster
-            min_r = min(p[0] for p in cluster)
-            max_r = max(p[0] for p in cluster)
-            min_c = min(p[1] for p in cluster)
-            max_c = max(p[1] for p in cluster)
+                    if tr < min_r:
+                        min_r = tr
+                    elif tr > max_r:
+                        max_r = tr
+                    if tc < min_c:
+                        min_c = tc
+                    elif tc > max_c:
+                        max_c = tc
+
             clusters.append((min_r, max_r, min_c, max_c))
 
         return clusters
@@ -698,89 +938,192 @@ class GomokuAI:
         Optimized move generation using multiple bounding boxes (windows).
         Satisfies the requirement for "multiple rectangular windows".
         """
-        relevant_moves = set()
+        return self._mask_to_moves(self._relevant_mask_windowed(board, num_moves))
 
+    def _relevant_mask_windowed(self, board, num_moves):
+        """
+        Flat boolean mask of the moves returned by get_relevant_moves_windowed.
+        The board must be a bytearray (it is viewed as a NumPy grid without copying).
+        """
         # Early game (< windowed_search_from_move): Use standard neighbor search
-        window_start_move = self.config["ai_settings"]["move_ordering"].get("windowed_search_from_move", 10)
-        if num_moves < window_start_move:
-            return self.get_relevant_moves(board)
+        if num_moves < self.windowed_search_from_move or not self.enable_windowed_search:
+            return self._relevant_mask(board)
 
-        # Get multiple windows based on clusters
-        # Separation distance ensures we don't merge far-apart groups
-        # Padding adds space for 5-in-a-row development
-        clusters = self.get_piece_clusters(board, separation_dist=4)
+        if not any(board):
+             return self._relevant_mask(board) # Fallback
 
-        move_ordering_cfg = self.config["ai_settings"]["move_ordering"]
-        if not move_ordering_cfg.get("enable_windowed_search", True):
-             return self.get_relevant_moves(board)
+        n = self.board_size
+        occupied = np.frombuffer(board, dtype=np.uint8).reshape(n, n) != 0
 
-        padding = move_ordering_cfg.get("bounding_box_margin", 2)
+        # Relevance check: empty cells with an occupied 8-neighbour. The 3x3
+        # neighbourhood counts are kept up to date across calls by
+        # _update_neighbor_counts.
+        has_neighbor = self._update_neighbor_counts(occupied)[1:-1, 1:-1] > 0
+        candidates = has_neighbor & ~occupied
 
-        if not clusters:
-             return self.get_relevant_moves(board) # Fallback
+        # Every neighbour of a stone lies within one cell of its cluster's bounding
+        # box, so with any padding the cluster windows cannot remove a candidate
+        # and clustering is skipped altogether.
+        padding = self.bounding_box_margin
+        if padding >= 1:
+            return candidates.ravel()
+
+        # Get multiple windows based on clusters
+        # Separation distance ensures we don't merge far-apart groups
+        clusters = self.get_piece_clusters(board, separation_dist=4)
 
+        # Union of the cluster windows
+        in_window = np.zeros((n, n), dtype=bool)
         for min_r, max_r, min_c, max_c in clusters:
-            # Apply padding
             start_r = max(0, min_r - padding)
-            end_r = min(self.board_size - 1, max_r + padding)
+            end_r = min(n - 1, max_r + padding)
             start_c = max(0, min_c - padding)
-            end_c = min(self.board_size - 1, max_c + padding)
-
-            # Scan within this window
-            for r in range(start_r, end_r + 1):
-                for c in range(start_c, end_c + 1):
-                    idx = r * self.board_size + c
-                    if board[idx] == 0:
-                        # Check if it's close to ANY existing piece (relevance check)
-                        # This is still needed to avoid empty corners of the rect
-                        # But strictly, if we are in a tight cluster bbox, most empty spots are relevant.
-                        # Let's do a quick check: has neighbor within relevance_range?
-
-                        has_neighbor = False
-                        # Check 3x3 around it
-                        for dr in range(-1, 2):
-                            for dc in range(-1, 2):
-                                if dr == 0 and dc == 0:
-                                    continue
-                                nr, nc = r + dr, c + dc
-                                if 0<=nr<self.board_size and 0<=nc<self.board_size:
-                                    if board[nr * self.board_size + nc] != 0:
-                                        has_neighbor = True
-                                        break
-                            if has_neighbor:
-                                break
-
-                        if has_neighbor:
-                            relevant_moves.add((r, c))
-
-        return list(relevant_moves)
-
-    def _get_capture_positions(self, r, c, player, board):
+            end_c = min(n - 1, max_c + padding)
+            in_window[start_r:end_r + 1, start_c:end_c + 1] = True
+
+        return (in_window & candidates).ravel()
+
+    def _update_neighbor_counts(self, occupied):
+        """
+        Brings _neighbor_counts up to date with the (n, n) occupancy grid and returns
+        it: the number of stones in the 3x3 neighbourhood of every cell, on an
+        (n + 2, n + 2) grid padded by one cell on each side. Only the neighbourhoods
+        of cells changed since the previous call are updated.
+        """
+        n = self.board_size
+        previous = self._neighbor_occupied
+        self._neighbor_occupied = occupied
+        counts = self._neighbor_counts
+
+        if previous is not None:
+            changed = np.flatnonzero(occupied != previous)
+            if len(changed) <= self.neighbor_update_limit:
+                # Cell (r, c) is at (r + 1, c + 1) in the padded grid
+                for idx in changed.tolist():
+                    r, c = divmod(idx, n)
+                    counts[r:r + 3, c:c + 3] += 1 if occupied[r, c] else -1
+                return counts
+
+        # Full rebuild: sum of the 9 shifted occupancy grids
+        counts = np.zeros((n + 2, n + 2), dtype=np.int16)
+        for dr in range(3):
+            for dc in range(3):
+                counts[dr:dr + n, dc:dc + n] += occupied
+        self._neighbor_counts = counts
+        return counts
+
+    def _init_capture_bitboards(self):
+        """
+        Build the tables for _get_capture_maps. Bitboards hold one byte per cell
+        (so they convert to/from bytes directly) with rows of n + 1 cells: the extra
+        always-empty guard cell stops shifted patterns from wrapping across rows.
+        """
+        n = self.board_size
+        guard = n * n
+        layout = []
+        for r in range(n):
+            layout.extend(range(r * n, r * n + n))
+            layout.append(guard)
+        self._bitboard_gather = itemgetter(*layout)
+        self._bitboard_len = len(layout)
+        # Bitboard byte of the first cell of each row, and bit shift of every board cell
+        self._bitboard_row_ofs = tuple(r * (n + 1) for r in range(n))
+        self._bitboard_shift = tuple(8 * (idx + idx // n) for idx in range(n * n))
+        # Shift (in bits) of one step along each axis: right, down, down-right, down-left
+        self._capture_shifts = tuple(8 * (dr * (n + 1) + dc) for dr, dc in DIRECTIONS_4)
+
+        self._stone_tables = {}
+        for player in (0, 1, 2):
+            table = bytearray(256)
+            table[player] = 1
+            self._stone_tables[player] = bytes(table)
+        # Per-cell count -> 1 if it is at least 2 (see _get_double_three_map)
+        self._at_least_two = bytes(1 if count >= 2 else 0 for count in range(256))
+        self._bitboard_mask = (1 << 8 * self._bitboard_len) - 1
+
+    def _get_bitboards(self, board):
+        """
+        Returns: (empty, (None, stones_player_1, stones_player_2)) as bitboards,
+        with cell (r, c) at byte r * (n + 1) + c
+        """
+        cells = bytes(self._bitboard_gather(bytes(board) + b'\x00'))
+        empty = int.from_bytes(cells.translate(self._stone_tables[0]), 'little')
+        stones = (None,
+                  int.from_bytes(cells.translate(self._stone_tables[1]), 'little'),
+                  int.from_bytes(cells.translate(self._stone_tables[2]), 'little'))
+        return empty, stones
+
+    def _get_double_three_map(self, own):
+        """
+        Finds the cells where a stone of the player owning the bitboard own could
+        create a double-three: each free three needs two more own stones within 3
+        cells of the move on its axis, so a double-three needs that on 2 axes.
+        Captures only remove opponent stones, so they cannot add to the count.
+        Any other cell is never rejected by GomokuLogic.is_legal_move when empty.
+        Counts may pick up stones across a row end, which only adds false alarms.
+
+        Returns:
+            bytes: map[r * (n + 1) + c] is non-zero if the move needs the full check
+        """
+        mask = self._bitboard_mask
+        axes_with_two = 0
+        for step in self._capture_shifts:
+            counts = 0
+            for k in (1, 2, 3):
+                counts += (own >> k * step) + ((own << k * step) & mask)
+            # Cells never hold more than 6, so per-cell counts do not carry
+            counts = counts.to_bytes(self._bitboard_len, 'little').translate(self._at_least_two)
+            axes_with_two += int.from_bytes(counts, 'little')
+        return axes_with_two.to_bytes(self._bitboard_len, 'little').translate(self._at_least_two)
+
+    def _get_capture_maps(self, board):
+        """
+        Finds, for the whole board at once, the empty cells where each player
+        would capture (P-O-O-P in any of the 8 directions), with bitboard shifts.
+
+        Returns:
+            tuple: (None, map_player_1, map_player_2); map[r * (n + 1) + c] is
+            non-zero if that player captures by playing (r, c)
+        """
+        empty, stones = self._get_bitboards(board)
+
+        maps = [None, None, None]
+        for player in (1, 2):
+            own = stones[player]
+            opp = stones[OPPONENT[player]]
+            capture_cells = 0
+            for step in self._capture_shifts:
+                # Pattern ahead of the cell, then behind it
+                capture_cells |= (opp >> step) & (opp >> 2 * step) & (own >> 3 * step)
+                capture_cells |= (opp << step) & (opp << 2 * step) & (own << 3 * step)
+            capture_cells &= empty
+            maps[player] = capture_cells.to_bytes(self._bitboard_len, 'little')
+        return tuple(maps)
+
+    def _get_capture_positions(self, r, c, player, board, cache=None):
         """
         Get positions that would be captured by placing a piece at (r, c).
         Returns list of (row, col) tuples to be captured.
         Does NOT modify the board.
+        cache, if given, is a dict memoizing the results for one board position.
         """
-        opponent = 2 if player == 1 else 1
+        if cache is not None:
+            key = (r * self.board_size + c, player)
+            captured = cache.get(key)
+            if captured is None:
+                captured = cache[key] = self._get_capture_positions(r, c, player, board)
+            return captured
+
+        opponent = OPPONENT[player]
         captured = []
 
         # Check all 8 directions for capture pattern: P-O-O-P
-        for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1),
-                       (0, -1), (-1, 0), (-1, -1), (-1, 1)]:
-            nr1, nc1 = r + dr, c + dc
-            nr2, nc2 = r + dr * 2, c + dc * 2
-            nr3, nc3 = r + dr * 3, c + dc * 3
-
-            if (0 <= nr3 < self.board_size and 0 <= nc3 < self.board_size):
-                idx1 = nr1 * self.board_size + nc1
-                idx2 = nr2 * self.board_size + nc2
-                idx3 = nr3 * self.board_size + nc3
-
-                if (board[idx1] == opponent and
-                    board[idx2] == opponent and
-                    board[idx3] == player):
-                    captured.append((nr1, nc1))
-                    captured.append((nr2, nc2))
+        for idx1, idx2, idx3, pos1, pos2 in self.capture_table[r * self.board_size + c]:
+            if (board[idx1] == opponent and
+                board[idx2] == opponent and
+                board[idx3] == player):
+                captured.append(pos1)
+                captured.append(pos2)
 
         return captured
 
@@ -789,41 +1132,34 @@ class GomokuAI:
         Gets moves that are within RELEVANCE_RANGE of existing pieces.
         Original implementation for early game.
         """
-        relevant_moves = set()
+        return self._mask_to_moves(self._relevant_mask(board))
 
-        # Special case: empty board (first move)
-        # Return center and nearby positions
-        board_has_pieces = False
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                idx = r * self.board_size + c
-                if board[idx] != 0:
-                    board_has_pieces = True
-                    break
-            if board_has_pieces:
-                break
+    def _relevant_mask(self, board):
+        """Flat boolean mask of the moves returned by get_relevant_moves."""
+        n = self.board_size
 
-        if not board_has_pieces:
+        # Special case: empty board (first move)
+        # Return center and nearby positions (any() stops at the first stone, in C)
+        if not any(board):
+            # 0/1 bytes are viewed as NumPy booleans without copying
+            mask = bytearray(n * n)
             # Return center region for first move
             center = self.board_size // 2
             for r in range(max(0, center - 2), min(self.board_size, center + 3)):
                 for c in range(max(0, center - 2), min(self.board_size, center + 3)):
-                    relevant_moves.add((r, c))
-            return list(relevant_moves)
-
-        # Normal case: find moves around existing pieces
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                idx = r * self.board_size + c
-                if board[idx] != 0:
-                    for dr in range(-self.relevance_range, self.relevance_range + 1):
-                        for dc in range(-self.relevance_range, self.relevance_range + 1):
-                            if dr == 0 and dc == 0:
-                                continue
-                            nr, nc = r + dr, c + dc
-                            if (0 <= nr < self.board_size and
-                                0 <= nc < self.board_size):
-                                n_idx = nr * self.board_size + nc
-                                if board[n_idx] == 0:
-                                    relevant_moves.add((nr, nc))
-        return list(relevant_moves)
+                    mask[r * n + c] = 1
+            return np.frombuffer(mask, dtype=bool)
+
+        # Normal case: empty cells within relevance_range (Chebyshev) of a stone.
+        # The square dilation is separable, so OR shifted copies along the rows
+        # and then along the columns instead of visiting every stone's neighbours.
+        occupied = np.frombuffer(board, dtype=np.uint8).reshape(n, n) != 0
+        near_rows = occupied.copy()
+        for d in range(1, self.relevance_range + 1):
+            near_rows[d:] |= occupied[:-d]
+            near_rows[:-d] |= occupied[d:]
+        near = near_rows.copy()
+        for d in range(1, self.relevance_range + 1):
+            near[:, d:] |= near_rows[:, :-d]
+            near[:, :-d] |= near_rows[:, d:]
+        return (near & ~occupied).ravel()
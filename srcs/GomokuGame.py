@@ -4,7 +4,7 @@ Main Gomoku game class that manages game state, rules, and UI rendering.
 
 import math
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pygame
 
@@ -57,7 +57,15 @@ class GomokuGame:
         self.COLOR_HIGHLIGHT = tuple(ui_cfg["colors"]["highlight"])
 
         # Animation settings
+        self.FPS = 30
         self.PULSE_SPEED = ui_cfg["animation"]["pulse_speed"]
+        # One pulse period (2*pi / PULSE_SPEED seconds) of highlight alphas, one per frame
+        pulse_frames = max(1, round(self.FPS * 2 * math.pi / self.PULSE_SPEED))
+        self.pulse_lut = [
+            (math.sin(2 * math.pi * i / pulse_frames) + 1) / 2 * 255
+            for i in range(pulse_frames)
+        ]
+        self.frame_idx = 0
 
         # Debug settings
         ai_cfg = config.get("ai_settings", {})
@@ -79,6 +87,9 @@ class GomokuGame:
         self.menu_font = pygame.font.SysFont(ui_cfg["fonts"]["main_font"], 48)
         self.small_menu_font = pygame.font.SysFont(ui_cfg["fonts"]["main_font"], 32)
 
+        # Grid, labels and star points never change: render them once
+        self.board_background = self.render_board_background()
+
         # Game mode
         self.game_mode = None  # Set by menu
         self.app_state = "MENU"  # Start in menu
@@ -97,6 +108,8 @@ class GomokuGame:
         self.hover_pos = None
         self.hover_is_illegal = False
         self.illegal_reason = ""
+        # (row, col, player, board hash) the hover state was last computed for
+        self._hover_key = None
         self.illegal_surface = pygame.Surface(
             (self.SQUARE_SIZE, self.SQUARE_SIZE), pygame.SRCALPHA
         )
@@ -106,6 +119,19 @@ class GomokuGame:
                         (5, self.SQUARE_SIZE - 5),
                         (self.SQUARE_SIZE - 5, 5), 4)
 
+        # Stones are rendered once and blitted; only occupied cells are drawn
+        self.stone_surfaces = {}
+        stone_center = (self.SQUARE_SIZE // 2, self.SQUARE_SIZE // 2)
+        stone_radius = self.SQUARE_SIZE // 2 - 3
+        for player, color in ((self.BLACK_PLAYER, self.COLOR_BLACK),
+                              (self.WHITE_PLAYER, self.COLOR_WHITE)):
+            surface = pygame.Surface((self.SQUARE_SIZE, self.SQUARE_SIZE), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, stone_center, stone_radius)
+            if player == self.WHITE_PLAYER:
+                pygame.draw.circle(surface, self.COLOR_BLACK, stone_center, stone_radius, 1)
+            self.stone_surfaces[player] = surface
+        self._stones = {}  # (row, col) -> player, kept in step with the board
+
         # Pending Win State
         self.game_state = "NORMAL"
         self.pending_win_player = None
@@ -117,10 +143,15 @@ class GomokuGame:
 
         # AI
         self.ai = GomokuAI(config)
+        # Searches run on a single background worker, so AI calls never overlap
+        # and the window keeps rendering while the AI thinks
+        self._ai_executor = ThreadPoolExecutor(max_workers=1)
+        self._ai_future = None
+        self._ai_request = None  # (kind, board hash, game mode) of the search in flight
 
         # Start with empty board - human can place first move anywhere
         self.current_player = self.HUMAN_PLAYER
-        self.logic.current_hash = self.logic.compute_initial_hash()
+        self.logic.current_hash = self.logic.empty_board_hash
         self.current_hash = self.logic.current_hash # Keep local reference synced if needed, or property
         self.move_count = 0  # No moves yet
 
@@ -151,7 +182,7 @@ class GomokuGame:
 
                 self.draw_menu()
                 pygame.display.flip()
-                clock.tick(30)
+                clock.tick(self.FPS)
                 continue
 
             # AI's turn
@@ -179,9 +210,12 @@ class GomokuGame:
                 pygame.display.flip()
                 self.generate_suggestion()
 
+            # Apply the result of a finished background search
+            self.poll_ai_search()
+
             # Update pulsing highlight for pending win
             if self.game_state == "PENDING_WIN":
-                self.pulse_alpha = (math.sin(time.time() * self.PULSE_SPEED) + 1) / 2 * 255
+                self.pulse_alpha = self.pulse_lut[self.frame_idx % len(self.pulse_lut)]
 
             # Check if it's human's turn
             is_human_turn = (self.game_mode == "P_VS_P") or \
@@ -193,6 +227,7 @@ class GomokuGame:
                 self.update_hover(pygame.mouse.get_pos())
             else:
                 self.hover_pos = None
+                self._hover_key = None
 
             # Event handling
             for event in pygame.event.get():
@@ -224,7 +259,8 @@ class GomokuGame:
             self.draw_hover()
 
             pygame.display.flip()
-            clock.tick(30)
+            clock.tick(self.FPS)
+            self.frame_idx += 1
 
     def reset_game(self):
         """Resets the game to initial state."""
@@ -236,6 +272,7 @@ class GomokuGame:
         self.logic.reset()
         self.board = self.logic.board  # Re-bind alias
         self.captures = self.logic.captures  # Re-bind alias
+        self._stones = {}
 
         self.game_over = False
         self.winner = None
@@ -243,13 +280,18 @@ class GomokuGame:
         self.hover_pos = None
         self.hover_is_illegal = False
         self.illegal_reason = ""
+        self._hover_key = None
         self.game_state = "NORMAL"
         self.pending_win_player = None
         self.pending_win_line = []
         self.suggested_move = None
 
+        # Drop any search still in flight; the table is cleared on the worker
+        # so it happens only after that search has finished
+        self._ai_future = None
+        self._ai_request = None
         self.ai.ai_is_thinking = False
-        self.ai.algorithm.clear_transposition_table()
+        self._ai_executor.submit(self.ai.clear_transposition_table)
 
         self.current_player = self.BLACK_PLAYER  # Always start with Black
 
@@ -266,6 +308,13 @@ class GomokuGame:
         col = round((x - self.MARGIN - self.SQUARE_SIZE // 2) / self.SQUARE_SIZE)
         row = round((y - self.MARGIN - self.SQUARE_SIZE // 2) / self.SQUARE_SIZE)
 
+        # Called every frame: only recompute when the cell, the player to move or
+        # the board (its Zobrist hash) changed since the last call
+        hover_key = (row, col, self.current_player, self.current_hash)
+        if hover_key == self._hover_key:
+            return
+        self._hover_key = hover_key
+
         if 0 <= row < self.BOARD_SIZE and 0 <= col < self.BOARD_SIZE:
             # 1D Access
             idx = row * self.BOARD_SIZE + col
@@ -317,10 +366,13 @@ class GomokuGame:
                                                    self.current_hash)
         self.current_hash = new_hash
         self.move_count += 1  # Increment move counter
+        self._stones[(row, col)] = player
 
         if captured_pieces:
             print(f"!!! Captured {len(captured_pieces)} pieces at: {captured_pieces}")
             self.captures[player] += len(captured_pieces)
+            for pos in captured_pieces:
+                del self._stones[pos]
 
         # Check for capture win
         if self.captures[player] >= (self.WIN_BY_CAPTURES * 2):
@@ -370,13 +422,47 @@ class GomokuGame:
 
             self.hover_pos = None
             self.hover_is_illegal = False
+            self._hover_key = None
 
     # ---
     # AI Move
     # ---
 
+    def start_ai_search(self, player, kind):
+        """
+        Submits a search for player to the background worker.
+
+        The search works on copies of the board and captures, so the main loop can
+        keep drawing (and checking hover legality on) the live board meanwhile.
+        """
+        self._ai_request = (kind, self.current_hash, self.game_mode)
+        self._ai_future = self._ai_executor.submit(
+            self.ai.get_best_move, bytearray(self.board), list(self.captures),
+            self.current_hash, player, self.WIN_BY_CAPTURES, self.logic, self.move_count
+        )
+
+    def poll_ai_search(self):
+        """Applies the result of the background search once it has finished."""
+        if self._ai_future is None or not self._ai_future.done():
+            return
+        future, self._ai_future = self._ai_future, None
+        kind, search_hash, search_mode = self._ai_request
+        self._ai_request = None
+        best_move, time_taken = future.result()
+
+        # The position or mode changed while searching: the result is stale
+        if (search_hash != self.current_hash or search_mode != self.game_mode or
+                self.game_over):
+            self.ai.ai_is_thinking = False
+            return
+
+        if kind == "move":
+            self.apply_ai_move(best_move, time_taken)
+        else:
+            self.apply_suggestion(best_move, time_taken)
+
     def run_ai_move(self):
-        """Runs the AI to get the best move."""
+        """Starts the AI search for its move; poll_ai_search applies the result."""
         # Hardcoded first move rule: if AI is Black and it's the first move, play center.
         if self.move_count == 0 and self.AI_PLAYER == self.BLACK_PLAYER:
             center = self.BOARD_SIZE // 2
@@ -386,11 +472,10 @@ class GomokuGame:
             self.last_move_time = 0
             return
 
-        best_move, time_taken = self.ai.get_best_move(
-            self.board, self.captures, self.current_hash, self.AI_PLAYER,
-            self.WIN_BY_CAPTURES, self.logic, self.move_count
-        )
+        self.start_ai_search(self.AI_PLAYER, "move")
 
+    def apply_ai_move(self, best_move, time_taken):
+        """Plays the move found by the AI search."""
         self.last_move_time = time_taken
 
         if best_move is None:
@@ -400,13 +485,12 @@ class GomokuGame:
         self.handle_move(best_move[0], best_move[1], self.AI_PLAYER)
 
     def generate_suggestion(self):
-        """Calculates a move for suggestion but doesn't apply it."""
+        """Starts calculating a move for suggestion; it is not applied."""
         print("--- generating suggestion ---")
-        best_move, time_taken = self.ai.get_best_move(
-            self.board, self.captures, self.current_hash, self.WHITE_PLAYER,
-            self.WIN_BY_CAPTURES, self.logic, self.move_count
-        )
+        self.start_ai_search(self.WHITE_PLAYER, "suggestion")
 
+    def apply_suggestion(self, best_move, time_taken):
+        """Stores the suggested move found by the AI search."""
         self.last_move_time = time_taken
         self.suggested_move = best_move
         self.ai.ai_is_thinking = False
@@ -416,9 +500,10 @@ class GomokuGame:
     # Drawing Functions
     # ---
 
-    def draw_board(self):
-        """Draws the game board."""
-        self.screen.fill(self.COLOR_BOARD)
+    def render_board_background(self):
+        """Renders the static board (grid, labels, star points, bottom bar) to a surface."""
+        surface = pygame.Surface((self.WIDTH, self.HEIGHT))
+        surface.fill(self.COLOR_BOARD)
 
         # Draw grid lines
         for i in range(self.BOARD_SIZE):
@@ -426,23 +511,23 @@ class GomokuGame:
                           self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE)
             end_pos_h = (self.WIDTH - self.MARGIN - self.SQUARE_SIZE // 2,
                         self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE)
-            pygame.draw.line(self.screen, self.COLOR_GRID, start_pos_h, end_pos_h, 1)
+            pygame.draw.line(surface, self.COLOR_GRID, start_pos_h, end_pos_h, 1)
 
             # Row labels
             label = self.font.render(str(i), True, self.COLOR_TEXT)
-            self.screen.blit(label, (self.MARGIN - 30, self.MARGIN + self.SQUARE_SIZE // 2 +
-                                    i * self.SQUARE_SIZE - label.get_height() // 2))
+            surface.blit(label, (self.MARGIN - 30, self.MARGIN + self.SQUARE_SIZE // 2 +
+                                 i * self.SQUARE_SIZE - label.get_height() // 2))
 
             start_pos_v = (self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE,
                           self.MARGIN + self.SQUARE_SIZE // 2)
             end_pos_v = (self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE,
                         self.HEIGHT - self.MARGIN - self.SQUARE_SIZE // 2 - self.BOTTOM_BAR_HEIGHT)
-            pygame.draw.line(self.screen, self.COLOR_GRID, start_pos_v, end_pos_v, 1)
+            pygame.draw.line(surface, self.COLOR_GRID, start_pos_v, end_pos_v, 1)
 
             # Column labels
             label = self.font.render(chr(ord('A') + i), True, self.COLOR_TEXT)
-            self.screen.blit(label, (self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE -
-                                    label.get_width() // 2, self.MARGIN - 30))
+            surface.blit(label, (self.MARGIN + self.SQUARE_SIZE // 2 + i * self.SQUARE_SIZE -
+                                 label.get_width() // 2, self.MARGIN - 30))
 
         # Draw star points
         quarter = int((self.BOARD_SIZE - 1) / 4)
@@ -452,26 +537,25 @@ class GomokuGame:
         for r, c in star_points:
             cx = self.MARGIN + self.SQUARE_SIZE // 2 + c * self.SQUARE_SIZE
             cy = self.MARGIN + self.SQUARE_SIZE // 2 + r * self.SQUARE_SIZE
-            pygame.draw.circle(self.screen, self.COLOR_GRID, (cx, cy), 5)
+            pygame.draw.circle(surface, self.COLOR_GRID, (cx, cy), 5)
 
         # Draw capture display background
-        pygame.draw.rect(self.screen, self.COLOR_CAPTURE_BG,
+        pygame.draw.rect(surface, self.COLOR_CAPTURE_BG,
                         (0, self.HEIGHT - self.BOTTOM_BAR_HEIGHT, self.WIDTH, self.BOTTOM_BAR_HEIGHT))
 
+        return surface
+
+    def draw_board(self):
+        """Draws the game board."""
+        self.screen.blit(self.board_background, (0, 0))
+
     def draw_pieces(self):
         """Draws the pieces on the board."""
-        for r in range(self.BOARD_SIZE):
-            for c in range(self.BOARD_SIZE):
-                idx = r * self.BOARD_SIZE + c
-                player = self.board[idx]
-                if player != self.EMPTY:
-                    cx = self.MARGIN + self.SQUARE_SIZE // 2 + c * self.SQUARE_SIZE
-                    cy = self.MARGIN + self.SQUARE_SIZE // 2 + r * self.SQUARE_SIZE
-                    radius = self.SQUARE_SIZE // 2 - 3
-                    color = self.COLOR_BLACK if player == self.BLACK_PLAYER else self.COLOR_WHITE
-                    pygame.draw.circle(self.screen, color, (cx, cy), radius)
-                    if player == self.WHITE_PLAYER:
-                        pygame.draw.circle(self.screen, self.COLOR_BLACK, (cx, cy), radius, 1)
+        self.screen.blits([
+            (self.stone_surfaces[player],
+             (self.MARGIN + c * self.SQUARE_SIZE, self.MARGIN + r * self.SQUARE_SIZE))
+            for (r, c), player in self._stones.items()
+        ], doreturn=False)
 
     def draw_highlights(self):
         """Draws highlights for pending win line."""
@@ -582,6 +666,10 @@ class GomokuGame:
 
     def quit_game(self):
         """Quits the game."""
+        # A search already running finishes (within its time limit) before the
+        # worker pool it may be using is shut down
+        self._ai_executor.shutdown(wait=True, cancel_futures=True)
+        self.ai.close_pool()
         pygame.quit()
         sys.exit()
 
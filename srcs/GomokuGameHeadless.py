@@ -200,6 +200,10 @@ class GomokuGameHeadless:
             self.game_over = True
             self.winner = None
 
+        # Shut down the AIs' move ordering worker pools (if enabled)
+        self.ai1.close_pool()
+        self.ai2.close_pool()
+
         # Generate results
         results = self.generate_results(verbose)
 
@@ -5,8 +5,10 @@ Encapsulates board state, rules, move validation, and win conditions.
 
 import random
 
+import numpy as np
+
 # Remove 'copy' import as we remove deepcopy usage
-from srcs.utils import get_line_values
+from srcs.utils import DIRECTIONS_4, OPPONENT, build_capture_table, build_line_windows, build_neighbor_table
 
 
 class GomokuLogic:
@@ -27,15 +29,48 @@ class GomokuLogic:
         self.WIN_BY_CAPTURES = game_cfg["win_by_captures"]
 
         # Initialize board and state
-        # OPTIMIZATION: Use 1D array for board
-        self.board = [self.EMPTY] * (self.BOARD_SIZE * self.BOARD_SIZE)
-        self.captures = {self.BLACK_PLAYER: 0, self.WHITE_PLAYER: 0}
+        # OPTIMIZATION: Use 1D array for board, one byte per cell (bytearray)
+        self.board = bytearray([self.EMPTY]) * (self.BOARD_SIZE * self.BOARD_SIZE)
+        # Captured stone counts, indexed by player number: a list instead of a dict
+        self.captures = [0] * (max(self.BLACK_PLAYER, self.WHITE_PLAYER) + 1)
+
+        # Flat indices along each of the 8 directions from every cell (capture/win scans)
+        self.neighbor_idx = build_neighbor_table(self.BOARD_SIZE)
+        # Capture patterns (P-O-O-P) from every cell, see build_capture_table
+        self.capture_table = build_capture_table(self.BOARD_SIZE)
+        # 13-cell windows through every cell along DIRECTIONS_4 (free-three checks)
+        self.line_windows = build_line_windows(self.BOARD_SIZE)
+        # Board value -> window code from each player's point of view:
+        # 0 = Empty, 1 = Player, 2 = Opponent (3 = Boundary comes from the window)
+        self._line_encode = {}
+        for player in (self.BLACK_PLAYER, self.WHITE_PLAYER):
+            table = bytearray(256)
+            table[player] = 1
+            table[OPPONENT[player]] = 2
+            self._line_encode[player] = bytes(table)
+        # 9-cell windows through every cell: a run of 5 inside one passes through its centre
+        self.five_windows = build_line_windows(self.BOARD_SIZE, DIRECTIONS_4, 4)
+        self._five_runs = {player: bytes([player]) * 5
+                           for player in (self.BLACK_PLAYER, self.WHITE_PLAYER)}
+        # Encoded window -> 1 if it holds a free three through its centre, filled
+        # lazily by count_free_threes_at; only a few thousand windows occur in play
+        self._free_three_table = {}
+        self.max_free_three_table_size = 1 << 18
+        # Board value -> 1 for that player's stones, 0 otherwise (bitboard packing)
+        self._stone_tables = {}
+        for player in (self.BLACK_PLAYER, self.WHITE_PLAYER):
+            table = bytearray(256)
+            table[player] = 1
+            self._stone_tables[player] = bytes(table)
 
         # Zobrist Hashing
         self.zobrist_table = []
         self.current_hash = 0
         self.init_zobrist()
-        self.current_hash = self.compute_initial_hash()
+        # The board is empty here; its hash is a constant of the table, so reset
+        # reuses it instead of rescanning the board
+        self.empty_board_hash = self.compute_initial_hash()
+        self.current_hash = self.empty_board_hash
 
         # Debug flags
         self.debug_terminal_states = False
@@ -44,28 +79,37 @@ class GomokuLogic:
 
     def init_zobrist(self):
         """Initializes the Zobrist hash table with random values."""
-        # Use 1D array for zobrist table for cache locality
-        # Size: BOARD_SIZE * BOARD_SIZE * 3 (EMPTY, BLACK, WHITE)
-        self.zobrist_table = [[0] * 3 for _ in range(self.BOARD_SIZE * self.BOARD_SIZE)]
-
-        for i in range(self.BOARD_SIZE * self.BOARD_SIZE):
-            for p in [self.EMPTY, self.BLACK_PLAYER, self.WHITE_PLAYER]:
-                self.zobrist_table[i][p] = random.randint(0, 2**64 - 1)
+        # One key per (cell, piece): BOARD_SIZE * BOARD_SIZE * 3 (EMPTY, BLACK, WHITE).
+        # Drawn as uint64 in a single NumPy call (seeded from the random module, so
+        # random.seed still makes hashes reproducible), then kept as Python ints:
+        # XOR-ing NumPy scalars into the Python int hash would be slower.
+        rng = np.random.default_rng(random.getrandbits(128))
+        keys = rng.integers(0, 2**64 - 1, size=(self.BOARD_SIZE * self.BOARD_SIZE, 3),
+                            dtype=np.uint64, endpoint=True)
+        # Canonical hashing: empty cells contribute nothing, so a board's hash is the
+        # XOR of its stones' keys however it was reached (and 0 when empty)
+        keys[:, self.EMPTY] = 0
+        self.zobrist_table = keys.tolist()
+        # NumPy copy for compute_initial_hash, which hashes a whole board at once
+        self._zobrist_array = keys
+        self._zobrist_cells = np.arange(self.BOARD_SIZE * self.BOARD_SIZE)
+
+        # Key of each player's stone on each cell, XOR-ed in and out by make/undo
+        self._zobrist_keys = {}
+        for player in (self.BLACK_PLAYER, self.WHITE_PLAYER):
+            self._zobrist_keys[player] = keys[:, player].tolist()
 
     def compute_initial_hash(self):
         """Computes the initial Zobrist hash of the board."""
-        h = 0
-        for i in range(self.BOARD_SIZE * self.BOARD_SIZE):
-            piece = self.board[i]
-            if piece != self.EMPTY:
-                h ^= self.zobrist_table[i][piece]
-        return h
+        # Each cell's key for its piece (0 for EMPTY), XOR-reduced in one C loop
+        pieces = np.frombuffer(self.board, dtype=np.uint8)
+        return int(np.bitwise_xor.reduce(self._zobrist_array[self._zobrist_cells, pieces]))
 
     def reset(self):
         """Resets the board and state."""
-        self.board = [self.EMPTY] * (self.BOARD_SIZE * self.BOARD_SIZE)
-        self.captures = {self.BLACK_PLAYER: 0, self.WHITE_PLAYER: 0}
-        self.current_hash = self.compute_initial_hash()
+        self.board = bytearray([self.EMPTY]) * (self.BOARD_SIZE * self.BOARD_SIZE)
+        self.captures = [0] * (max(self.BLACK_PLAYER, self.WHITE_PLAYER) + 1)
+        self.current_hash = self.empty_board_hash
 
     def _get_idx(self, r, c):
         """Helper to get 1D index."""
@@ -85,43 +129,39 @@ class GomokuLogic:
             return [], zobrist_hash
 
         # Update hash for placing the piece
-        zobrist_hash ^= self.zobrist_table[idx][self.EMPTY]
         board[idx] = player
-        zobrist_hash ^= self.zobrist_table[idx][player]
+        zobrist_hash ^= self._zobrist_keys[player][idx]
 
         # Check for captures
         captured_pieces = self.check_and_apply_captures(row, col, player, board)
 
         # Update hash for captured pieces
         if captured_pieces:
-            opponent = self.WHITE_PLAYER if player == self.BLACK_PLAYER else self.BLACK_PLAYER
+            opponent_keys = self._zobrist_keys[OPPONENT[player]]
             for (r_cap, c_cap) in captured_pieces:
-                cap_idx = r_cap * self.BOARD_SIZE + c_cap
-                zobrist_hash ^= self.zobrist_table[cap_idx][opponent]
-                zobrist_hash ^= self.zobrist_table[cap_idx][self.EMPTY]
+                zobrist_hash ^= opponent_keys[r_cap * self.BOARD_SIZE + c_cap]
 
         return captured_pieces, zobrist_hash
 
     def undo_move(self, r, c, player, board, captured_pieces, old_capture_count,
-                 captures_dict, zobrist_hash):
+                 captures, zobrist_hash):
         """Undoes a move on the board and restores the Zobrist hash."""
-        opponent = self.WHITE_PLAYER if player == self.BLACK_PLAYER else self.BLACK_PLAYER
+        opponent = OPPONENT[player]
 
         # Restore captured pieces
         if captured_pieces:
+            opponent_keys = self._zobrist_keys[opponent]
             for (cr, cc) in captured_pieces:
                 cap_idx = cr * self.BOARD_SIZE + cc
                 board[cap_idx] = opponent
-                zobrist_hash ^= self.zobrist_table[cap_idx][self.EMPTY]
-                zobrist_hash ^= self.zobrist_table[cap_idx][opponent]
+                zobrist_hash ^= opponent_keys[cap_idx]
 
-        captures_dict[player] = old_capture_count
+        captures[player] = old_capture_count
 
         # Remove the piece
         idx = r * self.BOARD_SIZE + c
         board[idx] = self.EMPTY
-        zobrist_hash ^= self.zobrist_table[idx][player]
-        zobrist_hash ^= self.zobrist_table[idx][self.EMPTY]
+        zobrist_hash ^= self._zobrist_keys[player][idx]
 
         return zobrist_hash
 
@@ -130,31 +170,26 @@ class GomokuLogic:
         Checks for captures after placing a piece and applies them.
         Returns: list of captured piece coordinates
         """
-        opponent = self.WHITE_PLAYER if player == self.BLACK_PLAYER else self.BLACK_PLAYER
-        all_captured = []
-
-        for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1),
-                      (0, -1), (-1, 0), (-1, -1), (-1, 1)]:
-            r1, c1 = last_row + dr, last_col + dc
-            r2, c2 = last_row + 2 * dr, last_col + 2 * dc
-            r3, c3 = last_row + 3 * dr, last_col + 3 * dc
-
-            if not (0 <= r1 < self.BOARD_SIZE and 0 <= c1 < self.BOARD_SIZE and
-                   0 <= r2 < self.BOARD_SIZE and 0 <= c2 < self.BOARD_SIZE and
-                   0 <= r3 < self.BOARD_SIZE and 0 <= c3 < self.BOARD_SIZE):
-                continue
+        all_captured = self.get_capture_positions(last_row, last_col, player, board)
+        for (r_cap, c_cap) in all_captured:
+            board[r_cap * self.BOARD_SIZE + c_cap] = self.EMPTY
+        return all_captured
 
-            idx1 = r1 * self.BOARD_SIZE + c1
-            idx2 = r2 * self.BOARD_SIZE + c2
-            idx3 = r3 * self.BOARD_SIZE + c3
+    def get_capture_positions(self, last_row, last_col, player, board):
+        """
+        Finds the pieces a piece of player at (last_row, last_col) captures.
+        Does NOT modify the board (the square itself may still be empty).
+        Returns: list of captured piece coordinates
+        """
+        opponent = OPPONENT[player]
+        all_captured = []
 
+        for idx1, idx2, idx3, pos1, pos2 in self.capture_table[last_row * self.BOARD_SIZE + last_col]:
             if (board[idx1] == opponent and
                 board[idx2] == opponent and
                 board[idx3] == player):
-                board[idx1] = self.EMPTY
-                board[idx2] = self.EMPTY
-                all_captured.append((r1, c1))
-                all_captured.append((r2, c2))
+                all_captured.append(pos1)
+                all_captured.append(pos2)
 
         return all_captured
 
@@ -173,87 +208,90 @@ class GomokuLogic:
         if board[idx] != self.EMPTY:
             return (False, "Occupied")
 
-        # OPTIMIZATION: Simulate move without deepcopy
-        opponent = self.WHITE_PLAYER if player == self.BLACK_PLAYER else self.BLACK_PLAYER
-
-        # Temporarily place stone
-        board[idx] = player
-
-        # Apply captures (modifies board)
-        captured_pieces = self.check_and_apply_captures(row, col, player, board)
+        # OPTIMIZATION: Simulate move without deepcopy, or any write to the board.
+        # The stone and the pieces it would capture are overlaid on the scanned lines.
+        captured_pieces = self.get_capture_positions(row, col, player, board)
 
-        # Check for double-threes on this modified board
-        free_threes_count = self.count_free_threes_at(row, col, player, board)
-
-        # RESTORE BOARD STATE
-        # 1. Restore captured pieces
-        for (r_cap, c_cap) in captured_pieces:
-            cap_idx = r_cap * self.BOARD_SIZE + c_cap
-            board[cap_idx] = opponent
-
-        # 2. Remove placed stone
-        board[idx] = self.EMPTY
+        # Check for double-threes on the position after the move
+        free_threes_count = self.count_free_threes_at(row, col, player, board, captured_pieces)
 
         if free_threes_count >= 2:
             return (False, "Illegal (Double-Three)")
 
         return (True, "Legal")
 
-    def count_free_threes_at(self, r, c, player, board):
+    def count_free_threes_at(self, r, c, player, board, captured=None):
         """
         Counts the number of free threes created by placing a piece at (r,c).
         OPTIMIZED: Uses numeric evaluation instead of strings.
+        By default the board must already show the move. If captured (the pieces the
+        move captures) is given, the board may show the position before the move:
+        the piece and the captures are applied to the line values instead.
+        Whether an encoded window holds a free three through its centre is looked
+        up in _free_three_table, filled lazily by _line_has_free_three.
         """
         count = 0
-        opponent = self.WHITE_PLAYER if player == self.BLACK_PLAYER else self.BLACK_PLAYER
+        encode = self._line_encode[player]
+        table = self._free_three_table
+        if len(table) > self.max_free_three_table_size:
+            table.clear()
 
         # We map board values directly to these (assuming logic matches constants)
         # 1 = Player (P), 2 = Opponent (O), 0 = Empty (E)
 
-        for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
-            # Get numeric line values (radius 6 is enough for length 5 patterns)
-            # center is at index 6
-            line = get_line_values(r, c, dr, dc, board, player, opponent, self.BOARD_SIZE)
-
-            found_this_axis = False
-
-            # Check EPPPE (0, 1, 1, 1, 0)
-            for i in range(9): # 0 to 8
-                # Check if pattern matches
-                if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 1 and
-                    line[i+3] == 1 and line[i+4] == 0):
-
-                    # Check if center (index 6) is part of the 3 Ps (indices i+1, i+2, i+3)
-                    if i+1 <= 6 <= i+3:
-                        count += 1
-                        found_this_axis = True
-                        break
-
-            if found_this_axis:
-                continue
-
-            # Check EPPEP (0, 1, 0, 1, 1)
-            for i in range(9):
-                if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 0 and
-                    line[i+3] == 1 and line[i+4] == 1):
-                     # Ps are at i+1, i+3, i+4
-                    if (i+1 == 6 or i+3 == 6 or i+4 == 6):
-                        count += 1
-                        found_this_axis = True
-                        break
-            if found_this_axis:
-                continue
-
-            # Check EPEPP (0, 1, 1, 0, 1)
-            for i in range(9):
-                if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 1 and
-                    line[i+3] == 0 and line[i+4] == 1):
-                    if (i+1 == 6 or i+2 == 6 or i+4 == 6):
-                        count += 1
-                        break
+        for (dr, dc), (head, cells, tail) in zip(DIRECTIONS_4, self.line_windows[r * self.BOARD_SIZE + c], strict=True):
+            # Numeric line values from the precomputed window (radius 6 is enough for
+            # length 5 patterns); center is at index 6
+            line = head + board[cells].translate(encode) + tail
+            if captured is not None:
+                line = bytearray(line)
+                line[6] = 1
+                for (cr, cc) in captured:
+                    k = cr - r if dr else cc - c
+                    if -6 <= k <= 6 and cr - r == dr * k and cc - c == dc * k:
+                        line[6 + k] = 0
+                line = bytes(line)
+
+            found = table.get(line)
+            if found is None:
+                found = table[line] = self._line_has_free_three(line)
+            count += found
 
         return count
 
+    @staticmethod
+    def _line_has_free_three(line):
+        """
+        1 if the encoded 13-cell line (center at index 6) holds a free three that
+        includes the center, else 0.
+        """
+        # Check EPPPE (0, 1, 1, 1, 0)
+        for i in range(9): # 0 to 8
+            # Check if pattern matches
+            if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 1 and
+                line[i+3] == 1 and line[i+4] == 0):
+
+                # Check if center (index 6) is part of the 3 Ps (indices i+1, i+2, i+3)
+                if i+1 <= 6 <= i+3:
+                    return 1
+
+        # Check EPPEP (0, 1, 0, 1, 1)
+        for i in range(9):
+            if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 0 and
+                line[i+3] == 1 and line[i+4] == 1):
+                 # Ps are at i+1, i+3, i+4
+                if (i+1 == 6 or i+3 == 6 or i+4 == 6):
+                    return 1
+
+        # Check EPEPP (0, 1, 1, 0, 1)
+        for i in range(9):
+            if (line[i] == 0 and line[i+1] == 1 and line[i+2] == 1 and
+                line[i+3] == 0 and line[i+4] == 1):
+                if (i+1 == 6 or i+2 == 6 or i+4 == 6):
+                    return 1
+
+        return 0
+
     # --- Win Checking ---
 
     def check_win(self, last_row, last_col, player, board):
@@ -261,39 +299,36 @@ class GomokuLogic:
         Checks if a move creates a 5-in-a-row.
         Returns: list of winning line coordinates or None
         """
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        for dr, dc in directions:
+        n = self.BOARD_SIZE
+        rays = self.neighbor_idx[last_row * n + last_col]
+        for d in range(len(DIRECTIONS_4)):
             win_line = [(last_row, last_col)]
 
-            # Check forward
-            for i in range(1, 5):
-                r, c = last_row + dr * i, last_col + dc * i
-                if 0 <= r < self.BOARD_SIZE and 0 <= c < self.BOARD_SIZE:
-                    idx = r * self.BOARD_SIZE + c
-                    if board[idx] == player:
-                        win_line.append((r, c))
-                    else:
+            # Check forward, then backward (the opposite direction is d + 4)
+            for ray in (rays[d][:4], rays[d + 4][:4]):
+                for idx in ray:
+                    if board[idx] != player:
                         break
-                else:
-                    break
-
-            # Check backward
-            for i in range(1, 5):
-                r, c = last_row - dr * i, last_col - dc * i
-                if 0 <= r < self.BOARD_SIZE and 0 <= c < self.BOARD_SIZE:
-                    idx = r * self.BOARD_SIZE + c
-                    if board[idx] == player:
-                        win_line.append((r, c))
-                    else:
-                        break
-                else:
-                    break
+                    win_line.append(divmod(idx, n))
 
             if len(win_line) >= 5:
                 return win_line
 
         return None
 
+    def has_five_at(self, row, col, player, board):
+        """
+        Boolean form of check_win for the search; the board must show the move.
+        Any run of 5 within 4 cells of (row, col) along an axis passes through it,
+        so each axis is one substring test on its 9-cell window, and no line
+        coordinates are built.
+        """
+        run = self._five_runs[player]
+        for _, cells, _ in self.five_windows[row * self.BOARD_SIZE + col]:
+            if run in board[cells]:
+                return True
+        return False
+
     def check_terminal_state(self, board, captures, player_who_just_moved, r, c,
                             win_by_captures):
         """Checks if the game has reached a terminal state (win condition)."""
@@ -305,16 +340,15 @@ class GomokuLogic:
             return True
 
         # Check 5-in-a-row
-        win_result = self.check_win(r, c, player_who_just_moved, board)
-        if win_result is not None:
+        if self.has_five_at(r, c, player_who_just_moved, board):
             # IMPORTANT: In our rules, 5-in-a-row is NOT an immediate win if it can be broken.
             # The game engine handles the "breaking" logic in the next turn.
             # Minimax needs to verify if the opponent can break it.
             # Therefore, we DO NOT treat this as a terminal state immediately.
             # We let the search continue one more ply (opponent's turn).
             # If opponent captures and breaks the line, the game continues.
-            # If opponent cannot break it, they have no moves that save them,
-            # and the evaluation function will naturally return a win score for us.
+            # If opponent cannot break it, the five still stands after their reply
+            # and the search scores that reply as a loss (see MinimaxAlgorithm.minimax).
 
             if self.debug_terminal_states:
                 print(f"    DEBUG check_terminal_state: Player {player_who_just_moved} has 5-in-a-row.")
@@ -324,3 +358,19 @@ class GomokuLogic:
             return False # Let the search continue to verify if it holds
 
         return False
+
+    def has_five(self, player, board):
+        """
+        Checks if player has a 5-in-a-row anywhere on the board.
+        The player's stones are packed into one integer bitboard (a byte per cell,
+        each row followed by an empty guard cell so runs cannot wrap between rows),
+        and each axis is tested for all cells at once with 4 shifts and ANDs.
+        """
+        n = self.BOARD_SIZE
+        rows = b'\x00'.join(bytes(board[r * n:(r + 1) * n]) for r in range(n))
+        stones = int.from_bytes(rows.translate(self._stone_tables[player]), 'little')
+        for step in (1, n + 1, n + 2, n):  # right, down, down-right, down-left
+            shift = 8 * step
+            if stones & (stones >> shift) & (stones >> 2 * shift) & (stones >> 3 * shift) & (stones >> 4 * shift):
+                return True
+        return False
@@ -6,6 +6,27 @@ null move pruning, and late move reductions.
 
 import math
 import time
+from dataclasses import dataclass
+
+from srcs.utils import OPPONENT
+
+# Transposition table entry flags
+TT_EXACT = 0
+TT_LOWERBOUND = 1
+TT_UPPERBOUND = 2
+
+
+@dataclass(slots=True)
+class GameContext:
+    """
+    What the search needs from the game: the AI (move ordering and delta
+    evaluation), the game logic (legality, undo, terminal checks) and the
+    constants of the position being searched.
+    """
+    ai: object
+    game_logic: object
+    num_moves: int
+    win_by_captures: int
 
 
 class MinimaxAlgorithm:
@@ -21,10 +42,19 @@ class MinimaxAlgorithm:
         self.max_depth = algo_cfg["max_depth"]
         self.time_limit = algo_cfg["time_limit"]
         self.win_score = heuristic_cfg["scores"]["win_score"]
+        # Terminal wins must be higher than any heuristic evaluation
+        # A 5-in-a-row scores win_score in every line window holding it (up to 9 per
+        # axis), so a board with fives can evaluate to ~10B: use 100x win_score
+        self.terminal_score = self.win_score * 100
 
         # Optimization flags
         self.enable_null_move_pruning = algo_cfg.get("enable_null_move_pruning", True)
         self.null_move_reduction = algo_cfg.get("null_move_reduction", 2)
+        self.enable_aspiration_windows = algo_cfg.get("enable_aspiration_windows", True)
+        self.aspiration_window_delta = algo_cfg.get("aspiration_window_delta", 500000)
+        # Past an open four the score swings by whole threat values between depths,
+        # so a narrow window would only cause repeated re-searches
+        self.aspiration_score_limit = heuristic_cfg["scores"]["open_four"]
 
         # Debug settings
         ai_cfg = config.get("ai_settings", {})
@@ -32,7 +62,22 @@ class MinimaxAlgorithm:
         self.debug_verbose = debug_cfg.get("verbose", False)
 
         # Transposition table for caching positions
-        self.transposition_table = {}
+        # Fixed-size, struct-of-arrays layout indexed by (hash & mask): a probe only
+        # touches keys/depths until the entry is known to be usable
+        self.tt_size = 1 << algo_cfg.get("tt_size_bits", 18)
+        self.tt_mask = self.tt_size - 1
+        self.tt_keys = [None] * self.tt_size
+        self.tt_values = [0] * self.tt_size
+        self.tt_depths = [0] * self.tt_size
+        self.tt_flags = [TT_EXACT] * self.tt_size
+        self.tt_moves = [None] * self.tt_size  # Best move found, tried first on re-visit
+        # The table is kept across moves: every entry records the search (generation)
+        # that wrote it, and a search only protects its own deeper entries from being
+        # replaced. Scores are from the searching player's point of view, so the table
+        # is only reused while the same player searches.
+        self.tt_generations = [0] * self.tt_size
+        self.tt_generation = 0
+        self.tt_player = None
 
         # Search state
         self.time_limit_reached = False
@@ -46,9 +91,38 @@ class MinimaxAlgorithm:
 
     def clear_transposition_table(self):
         """Clears the transposition table."""
-        self.transposition_table.clear()
+        # Only keys need resetting: an entry is ignored unless its key matches
+        self.tt_keys[:] = [None] * self.tt_size
+        self.tt_player = None
         self.history_table.clear()
 
+    def advance_generation(self, ai_player):
+        """
+        Starts a new search generation for ai_player, keeping the transposition
+        table entries of earlier searches (cleared instead if the player changed).
+        """
+        if ai_player != self.tt_player:
+            self.clear_transposition_table()
+            self.tt_player = ai_player
+        self.tt_generation += 1
+        self.history_table.clear()
+
+    def _store_tt_entry(self, slot, full_hash, score, depth, flag, best_move):
+        """
+        Writes a transposition table entry into its slot. A deeper entry for another
+        position written by the current search is kept; entries of earlier searches
+        are always replaced.
+        """
+        if (self.tt_depths[slot] > depth and self.tt_generations[slot] == self.tt_generation
+                and self.tt_keys[slot] != full_hash):
+            return
+        self.tt_generations[slot] = self.tt_generation
+        self.tt_keys[slot] = full_hash
+        self.tt_values[slot] = score
+        self.tt_depths[slot] = depth
+        self.tt_flags[slot] = flag
+        self.tt_moves[slot] = best_move
+
     def get_history_score(self, r, c):
         """Gets the history score for a move."""
         return self.history_table.get((r, c), 0)
@@ -66,9 +140,7 @@ class MinimaxAlgorithm:
             return True
         return False
 
-    def iterative_deepening_search(self, game_state, ai_player, initial_board_score,
-                                   ordered_moves_func, make_move_func, undo_move_func,
-                                   is_legal_func, check_terminal_func, num_moves=0):
+    def iterative_deepening_search(self, game_state, ai_player, initial_board_score, ctx):
         """
         Performs iterative deepening search with adaptive starting depth.
 
@@ -76,12 +148,7 @@ class MinimaxAlgorithm:
             game_state: The current game state (board, captures, etc.)
             ai_player: The AI player number
             initial_board_score: The initial evaluation of the board
-            ordered_moves_func: Function to get ordered moves
-            make_move_func: Function to make a move and get delta
-            undo_move_func: Function to undo a move
-            is_legal_func: Function to check if a move is legal
-            check_terminal_func: Function to check terminal state
-            num_moves: Total number of moves played (for adaptive start)
+            ctx: GameContext of the search
 
         Returns:
             tuple: (best_move, best_score, search_depth_reached)
@@ -105,11 +172,39 @@ class MinimaxAlgorithm:
         for depth in range(start_depth, self.max_depth + 1):
             self.current_depth = depth
 
-            # Standard minimax search with full alpha-beta window
-            best_move_this_depth, best_score_this_depth = self.minimax_root(
-                game_state, ai_player, initial_board_score, depth,
-                ordered_moves_func, make_move_func, undo_move_func,
-                is_legal_func, check_terminal_func, -math.inf, math.inf)
+            # Aspiration window: search a narrow window around the previous score
+            # and widen it (doubling) on a fail-low/fail-high until the score fits.
+            # The first iteration has no previous score and uses the full window, as
+            # do tactical positions (see aspiration_score_limit).
+            # The previous iteration's best move is searched first
+            window = self.aspiration_window_delta
+            if (self.enable_aspiration_windows and depth_reached > 0 and
+                abs(best_score_so_far) < self.aspiration_score_limit):
+                alpha = best_score_so_far - window
+                beta = best_score_so_far + window
+            else:
+                alpha, beta = -math.inf, math.inf
+
+            while True:
+                best_move_this_depth, best_score_this_depth = self.minimax_root(
+                    game_state, ai_player, initial_board_score, depth, ctx, alpha, beta,
+                    pv_move=best_move_so_far)
+
+                if self.time_limit_reached:
+                    break
+
+                if best_score_this_depth <= alpha and alpha != -math.inf:
+                    window *= 2
+                    alpha = best_score_so_far - window if window < self.terminal_score else -math.inf
+                elif best_score_this_depth >= beta and beta != math.inf:
+                    window *= 2
+                    beta = best_score_so_far + window if window < self.terminal_score else math.inf
+                else:
+                    break
+
+                if self.debug_verbose:
+                    print(f"Aspiration window failed at depth {depth} "
+                          f"(score {best_score_this_depth:.0f}). Re-searching with [{alpha}, {beta}]")
 
             if self.time_limit_reached:
                 print(f"Search at depth {depth} timed out. Using result from depth {depth_reached}.")
@@ -123,9 +218,9 @@ class MinimaxAlgorithm:
                 print(f"Completed depth {depth}. Best move: {best_move_so_far}, Score: {best_score_so_far:.0f}")
 
             # Only stop early if we found a TERMINAL win (not just high heuristic score)
-            # Terminal wins return 2x win_score, heuristic scores can reach ~1.6B
-            # Check if score is >= 1.9x win_score (guaranteed terminal win)
-            if abs(best_score_so_far) >= self.win_score * 1.9:
+            # Terminal wins return terminal_score, above any heuristic score
+            # Check if score is >= 95% of it (guaranteed terminal win)
+            if abs(best_score_so_far) >= self.terminal_score * 0.95:
                 if self.debug_verbose:
                     print(f"Found a terminal winning move at depth {depth}. Score: {best_score_so_far:.0f}")
                     print(f"  Move: {best_move_so_far}")
@@ -140,9 +235,12 @@ class MinimaxAlgorithm:
             print("WARNING: No move found in time limit. Returning first legal move.")
             # Get first legal move from ordered moves
             board, captures, zobrist_hash = game_state
-            ordered_moves = ordered_moves_func(board, captures, ai_player)
+            ordered_moves = ctx.ai.get_ordered_moves(
+                board, captures, ai_player, ctx.game_logic, ctx.num_moves, ctx.win_by_captures,
+                zobrist_hash
+            )
             for (r, c) in ordered_moves:
-                is_legal, _ = is_legal_func(r, c, ai_player, board)
+                is_legal, _ = ctx.game_logic.is_legal_move(r, c, ai_player, board)
                 if is_legal:
                     best_move_so_far = (r, c)
                     best_score_so_far = 0
@@ -151,55 +249,65 @@ class MinimaxAlgorithm:
 
         return best_move_so_far, best_score_so_far, depth_reached
 
-    def minimax_root(self, game_state, ai_player, current_board_score, depth,
-                    ordered_moves_func, make_move_func, undo_move_func,
-                    is_legal_func, check_terminal_func, alpha=-math.inf, beta=math.inf):
+    def minimax_root(self, game_state, ai_player, current_board_score, depth, ctx,
+                    alpha=-math.inf, beta=math.inf, pv_move=None):
         """
         Root call of the minimax algorithm (maximizing player's turn).
+        pv_move, if given, is searched before the other ordered moves.
         """
         board, captures, zobrist_hash = game_state
         best_score = -math.inf
         best_move = None
 
-        ordered_moves = ordered_moves_func(board, captures, ai_player)
+        ai = ctx.ai
+        game_logic = ctx.game_logic
+        win_by_captures = ctx.win_by_captures
+        ordered_moves = ai.get_ordered_moves(
+            board, captures, ai_player, game_logic, ctx.num_moves, win_by_captures,
+            zobrist_hash, pv_move
+        )
 
         if not ordered_moves:
             return (None, 0)
 
+        # A five the opponent completed wins unless this move breaks it
+        opponent = OPPONENT[ai_player]
+        pending_five = game_logic.has_five(opponent, board)
+
         for (r, c) in ordered_moves:
             if self.time_limit_reached:
                 return best_move if best_move else None, best_score if best_move else 0
 
-            is_legal, _ = is_legal_func(r, c, ai_player, board)
-            if not is_legal:
+            # Ordered moves are already legal; only the PV move is unchecked
+            if (r, c) == pv_move and not game_logic.is_legal_move(r, c, ai_player, board)[0]:
                 continue
 
             # Make move and get delta
-            delta, captured_pieces, old_cap_count, new_hash = make_move_func(
-                r, c, ai_player, board, captures, zobrist_hash
+            delta, captured_pieces, old_cap_count, new_hash = ai.make_move_and_get_delta(
+                r, c, ai_player, board, captures, zobrist_hash, game_logic, win_by_captures
             )
             captures[ai_player] = old_cap_count + len(captured_pieces)
 
             # Check for immediate win
             # At root level (maximizing), this IS an immediate win - game would end here
-            is_terminal = check_terminal_func(board, captures, ai_player, r, c)
+            is_terminal = game_logic.check_terminal_state(board, captures, ai_player, r, c, win_by_captures)
             if is_terminal:
                 print(f"  DEBUG minimax_root: Terminal state detected at move ({r}, {c})")
                 print(f"    Player: {ai_player}, Captures: {captures}")
-                # Terminal wins must be higher than any heuristic evaluation
-                # Heuristic can reach ~1.6B (pending_win + bonuses), so use 2x win_score
-                score = self.win_score * 2
+                score = self.terminal_score
+            elif pending_five and game_logic.has_five(opponent, board):
+                # The opponent's five still stands: they win
+                score = -self.terminal_score
             else:
                 # Recursive minimax call
                 score = self.minimax(
                     (board, captures, new_hash), depth - 1, alpha, beta, False,
-                    current_board_score + delta, ai_player,
-                    ordered_moves_func, make_move_func, undo_move_func,
-                    is_legal_func, check_terminal_func
+                    current_board_score + delta, ai_player, ctx,
+                    game_logic.has_five_at(r, c, ai_player, board)
                 )
 
             # Undo move
-            undo_move_func(r, c, ai_player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
+            game_logic.undo_move(r, c, ai_player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
 
             if self.time_limit_reached:
                 return best_move if best_move else None, best_score if best_move else 0
@@ -215,8 +323,7 @@ class MinimaxAlgorithm:
         return best_move, best_score
 
     def minimax(self, game_state, depth, alpha, beta, is_maximizing_player,
-               current_score, ai_player, ordered_moves_func, make_move_func,
-               undo_move_func, is_legal_func, check_terminal_func):
+               current_score, ai_player, ctx, pending_five=False):
         """
         Recursive minimax algorithm with alpha-beta pruning, delta heuristic,
         null move pruning, and late move reductions.
@@ -229,11 +336,9 @@ class MinimaxAlgorithm:
             is_maximizing_player: Whether this is the maximizing player's turn
             current_score: The current evaluation score (updated via deltas)
             ai_player: The AI player number
-            ordered_moves_func: Function to get ordered moves
-            make_move_func: Function to make a move and get delta
-            undo_move_func: Function to undo a move
-            is_legal_func: Function to check if a move is legal
-            check_terminal_func: Function to check terminal state
+            ctx: GameContext of the search
+            pending_five: Whether the previous move completed a 5-in-a-row, which
+                wins unless the player to move breaks it by capture
 
         Returns:
             int: The evaluation score
@@ -252,83 +357,107 @@ class MinimaxAlgorithm:
         # Combine zobrist hash with capture counts using simple arithmetic
         # This avoids creating temporary objects (tuple, list) on every node
         full_hash = zobrist_hash ^ (captures[1] * 7919) ^ (captures[2] * 7927)
-        if full_hash in self.transposition_table:
-            tt_score, tt_depth, tt_flag = self.transposition_table[full_hash]
-            if tt_depth >= depth:
-                if tt_flag == 'EXACT':
+        tt_slot = full_hash & self.tt_mask
+        hash_move = None
+        if self.tt_keys[tt_slot] == full_hash:
+            # Even a too-shallow entry still tells us which move to try first
+            hash_move = self.tt_moves[tt_slot]
+            if self.tt_depths[tt_slot] >= depth:
+                tt_score = self.tt_values[tt_slot]
+                tt_flag = self.tt_flags[tt_slot]
+                if tt_flag == TT_EXACT:
                     return tt_score
-                elif tt_flag == 'LOWERBOUND':
+                elif tt_flag == TT_LOWERBOUND:
                     alpha = max(alpha, tt_score)
-                elif tt_flag == 'UPPERBOUND':
+                elif tt_flag == TT_UPPERBOUND:
                     beta = min(beta, tt_score)
                 if alpha >= beta:
                     return tt_score
 
-        # Base case: leaf node
-        if depth == 0:
+        # Base case: leaf node. A pending five is resolved past the horizon:
+        # the reply that may break it is always searched
+        if depth <= 0 and not pending_five:
             return current_score
 
-        # Null Move Pruning (only for non-critical positions)
+        # Null Move Pruning (only for non-critical positions; passing never
+        # breaks a pending five)
         if (self.enable_null_move_pruning and depth >= 3 and not is_maximizing_player and
+            not pending_five and
             abs(current_score) < self.win_score * 0.3):  # Not in critical position
 
             # Try a "null move" - opponent passes, we get to move again
             null_score = self.minimax(
                 game_state, depth - 1 - self.null_move_reduction,
                 alpha, beta, True,
-                current_score, ai_player,
-                ordered_moves_func, make_move_func, undo_move_func,
-                is_legal_func, check_terminal_func
+                current_score, ai_player, ctx
             )
 
             if null_score >= beta:
                 return beta  # Fail-high cutoff
 
         # Determine current player
-        player = ai_player if is_maximizing_player else (2 if ai_player == 1 else 1)
+        player = ai_player if is_maximizing_player else OPPONENT[ai_player]
 
-        ordered_moves = ordered_moves_func(board, captures, player)
+        ai = ctx.ai
+        game_logic = ctx.game_logic
+        win_by_captures = ctx.win_by_captures
+        ordered_moves = ai.get_ordered_moves(
+            board, captures, player, game_logic, ctx.num_moves, win_by_captures,
+            zobrist_hash, hash_move
+        )
 
         if not ordered_moves:
             return current_score
 
+        # Bind hot attributes to locals once per node (LOAD_FAST in the move loop)
+        minimax = self.minimax
+        history_table = self.history_table
+        is_legal_move = game_logic.is_legal_move
+        make_move_and_get_delta = ai.make_move_and_get_delta
+        undo_move = game_logic.undo_move
+        check_terminal_state = game_logic.check_terminal_state
+        has_five_at = game_logic.has_five_at
+        has_five = game_logic.has_five
+        opponent = OPPONENT[player]
+
         # Maximizing player
         if is_maximizing_player:
             best_score = -math.inf
+            best_move = None
             move_number = 0
-            flag = 'UPPERBOUND'  # Assume fail-low
+            flag = TT_UPPERBOUND  # Assume fail-low
 
             for (r, c) in ordered_moves:
-                is_legal, _ = is_legal_func(r, c, player, board)
-                if not is_legal:
+                # Ordered moves are already legal; only the hash move is unchecked
+                if (r, c) == hash_move and not is_legal_move(r, c, player, board)[0]:
                     continue
 
                 move_number += 1
 
                 # Make move and get delta
-                delta, captured_pieces, old_cap_count, new_hash = make_move_func(
-                    r, c, player, board, captures, zobrist_hash
+                delta, captured_pieces, old_cap_count, new_hash = make_move_and_get_delta(
+                    r, c, player, board, captures, zobrist_hash, game_logic, win_by_captures
                 )
                 captures[player] = old_cap_count + len(captured_pieces)
 
-                is_terminal = check_terminal_func(board, captures, player, r, c)
+                is_terminal = check_terminal_state(board, captures, player, r, c, win_by_captures)
                 if is_terminal:
                     # Terminal state detected - this position wins the game
-                    # Terminal wins must be higher than any heuristic evaluation
-                    # Heuristic can reach ~1.6B (pending_win + bonuses), so use 2x win_score
-                    score = self.win_score * 2
+                    score = self.terminal_score
+                elif pending_five and has_five(opponent, board):
+                    # The opponent's five still stands: they win
+                    score = -self.terminal_score
                 else:
                     # Standard recursive search
-                    score = self.minimax(
+                    score = minimax(
                         (board, captures, new_hash), depth - 1,
                         alpha, beta, False,
-                        current_score + delta, ai_player,
-                        ordered_moves_func, make_move_func, undo_move_func,
-                        is_legal_func, check_terminal_func
+                        current_score + delta, ai_player, ctx,
+                        has_five_at(r, c, player, board)
                     )
 
                 # Undo move
-                undo_move_func(r, c, player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
+                undo_move(r, c, player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
 
                 if self.time_limit_reached:
                     return current_score
@@ -336,55 +465,59 @@ class MinimaxAlgorithm:
                 best_score = max(best_score, score)
                 if best_score > alpha:
                     alpha = best_score
-                    flag = 'EXACT'
+                    flag = TT_EXACT
+                    best_move = (r, c)
 
                 if beta <= alpha:
                     # Update History Heuristic
                     # Bonus proportional to depth squared (deeper cutoffs are more valuable)
-                    self.history_table[(r, c)] = self.history_table.get((r, c), 0) + depth * depth
+                    history_table[(r, c)] = history_table.get((r, c), 0) + depth * depth
 
-                    flag = 'LOWERBOUND'
+                    flag = TT_LOWERBOUND
                     break
 
-            self.transposition_table[full_hash] = (best_score, depth, flag)
+            self._store_tt_entry(tt_slot, full_hash, best_score, depth, flag, best_move)
             return best_score
 
         # Minimizing player
         else:
             best_score = math.inf
+            best_move = None
             move_number = 0
-            flag = 'LOWERBOUND'  # Assume fail-high
+            flag = TT_LOWERBOUND  # Assume fail-high
 
             for (r, c) in ordered_moves:
-                is_legal, _ = is_legal_func(r, c, player, board)
-                if not is_legal:
+                # Ordered moves are already legal; only the hash move is unchecked
+                if (r, c) == hash_move and not is_legal_move(r, c, player, board)[0]:
                     continue
 
                 move_number += 1
 
                 # Make move and get delta
-                delta, captured_pieces, old_cap_count, new_hash = make_move_func(
-                    r, c, player, board, captures, zobrist_hash
+                delta, captured_pieces, old_cap_count, new_hash = make_move_and_get_delta(
+                    r, c, player, board, captures, zobrist_hash, game_logic, win_by_captures
                 )
                 captures[player] = old_cap_count + len(captured_pieces)
 
-                is_terminal = check_terminal_func(board, captures, player, r, c)
+                is_terminal = check_terminal_state(board, captures, player, r, c, win_by_captures)
                 if is_terminal:
                     # Opponent wins - this is worst case for us
                     # Terminal losses must be lower than any heuristic evaluation
-                    score = -self.win_score * 2
+                    score = -self.terminal_score
+                elif pending_five and has_five(opponent, board):
+                    # Our five still stands: we win
+                    score = self.terminal_score
                 else:
                     # Standard recursive search
-                    score = self.minimax(
+                    score = minimax(
                         (board, captures, new_hash), depth - 1,
                         alpha, beta, True,
-                        current_score - delta, ai_player,
-                        ordered_moves_func, make_move_func, undo_move_func,
-                        is_legal_func, check_terminal_func
+                        current_score - delta, ai_player, ctx,
+                        has_five_at(r, c, player, board)
                     )
 
                 # Undo move
-                undo_move_func(r, c, player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
+                undo_move(r, c, player, board, captured_pieces, old_cap_count, captures, zobrist_hash)
 
                 if self.time_limit_reached:
                     return current_score
@@ -392,14 +525,15 @@ class MinimaxAlgorithm:
                 best_score = min(best_score, score)
                 if best_score < beta:
                     beta = best_score
-                    flag = 'EXACT'
+                    flag = TT_EXACT
+                    best_move = (r, c)
 
                 if beta <= alpha:
                     # Update History Heuristic
-                    self.history_table[(r, c)] = self.history_table.get((r, c), 0) + depth * depth
+                    history_table[(r, c)] = history_table.get((r, c), 0) + depth * depth
 
-                    flag = 'UPPERBOUND'
+                    flag = TT_UPPERBOUND
                     break
 
-            self.transposition_table[full_hash] = (best_score, depth, flag)
+            self._store_tt_entry(tt_slot, full_hash, best_score, depth, flag, best_move)
             return best_score
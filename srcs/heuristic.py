@@ -3,6 +3,54 @@ Heuristic evaluation module for Gomoku AI.
 Contains all scoring constants and pattern recognition functions.
 """
 
+from functools import cache
+
+import numpy as np
+
+from srcs.utils import OPPONENT, build_line_windows
+
+# Axes of the 4 lines through a cell, in score_lines_at order
+LINE_AXES = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+@cache
+def build_line_keys(n):
+    """
+    For every cell of an n x n board, the key of the 9-cell segment centred on it
+    along each of LINE_AXES, used by calculate_player_score to score each segment
+    once. The on-board part of a segment is fixed by its axis and end cells, so
+    the key packs them as (axis << 40) | (start << 20) | end. Short diagonals in
+    the corners clip to the same segment from several centres.
+    """
+    line_keys = []
+    for r in range(n):
+        for c in range(n):
+            keys = []
+            for axis, (dr, dc) in enumerate(LINE_AXES):
+                indices = [(r + dr * i) * n + c + dc * i for i in range(-4, 5)
+                           if 0 <= r + dr * i < n and 0 <= c + dc * i < n]
+                keys.append((axis << 40) | (indices[0] << 20) | indices[-1])
+            line_keys.append(tuple(keys))
+    return tuple(line_keys)
+
+
+@cache
+def build_padded_window_index(n):
+    """
+    The windows of build_line_windows(n, LINE_AXES) as flat indices into an (n + 12) x (n + 12)
+    board padded by 6 boundary cells on each side: shape (n * n, 4, 13), so one
+    fancy-indexing call gathers the windows of many cells at once.
+    """
+    size = n + 12
+    rows, cols = np.divmod(np.arange(n * n), n)
+    steps = np.arange(-6, 7)
+    index = np.empty((n * n, len(LINE_AXES), 13), dtype=np.intp)
+    for axis, (dr, dc) in enumerate(LINE_AXES):
+        index[:, axis] = ((rows[:, None] + 6 + dr * steps) * size
+                          + cols[:, None] + 6 + dc * steps)
+    index.flags.writeable = False
+    return index
+
 
 class HeuristicEvaluator:
     """
@@ -34,14 +82,60 @@ class HeuristicEvaluator:
         # Store capture defense config for position evaluation
         self.capture_defense_cfg = heuristic_cfg.get("capture_defense", {})
 
-        # Pre-allocated buffer for line values (avoid repeated allocations)
-        self._line_buffer = [0] * 13
+        # Precomputed line windows: for every cell, the in-bounds part of the 13-cell
+        # window on each of the 4 axes as a strided slice of the flat board, so
+        # score_lines_at gathers a whole window with one C-level call instead of
+        # stepping and bounds-checking cell by cell
+        self._init_line_windows()
+
+        # Window -> score lookup table, one per (captures, critical) scoring context.
+        # Filled lazily: the exhaustive table over 13-cell windows (4^13 entries) is far
+        # too large to build up front, but only a few thousand windows occur in play.
+        self._line_score_tables = {}
+        self.max_line_table_size = 1 << 20
+
+        # Move pair score cache for score_moves_pair, one per (player, critical flags):
+        # (cell, contents of its 4 windows) -> (player_score, opponent_score). Sibling
+        # positions in the search share most candidate neighbourhoods, so a cell is
+        # re-scored only when a stone in one of its windows changed.
+        self._move_pair_caches = {}
+        self.max_move_pair_cache_size = 1 << 17
 
         # Numeric Pattern Constants
         # 0=Empty, 1=Player, 2=Opponent, 3=Boundary
         # We pre-compile these as tuples for fast matching
         self._init_patterns()
 
+    def _init_line_windows(self):
+        """
+        Build per-cell window slices and the byte tables used to encode windows.
+        Encoded windows use 1 byte per cell: 0=Empty, 1=Player, 2=Opponent, 3=Boundary.
+        The board must be a bytearray so a sliced window can be translated directly.
+        """
+        self._line_axes = LINE_AXES
+        self._line_windows = build_line_windows(self.board_size, LINE_AXES)
+        self._line_keys = build_line_keys(self.board_size)
+
+        # Board value -> window code, one table per point of view. Boundary cells
+        # (3) only occur on the padded board of _score_cells_pair_batch.
+        self._encode = {}
+        self._encode_array = {}
+        for player in (1, 2):
+            table = bytearray([2] * 256)
+            table[0] = 0
+            table[player] = 1
+            table[3] = 3
+            self._encode[player] = bytes(table)
+            self._encode_array[player] = np.frombuffer(self._encode[player], dtype=np.uint8)
+
+        # Padded board and window index for scoring many cells with NumPy
+        n = self.board_size
+        self._window_index = build_padded_window_index(n)
+        self._padded_board = np.full((n + 12) * (n + 12), 3, dtype=np.uint8)
+        self._padded_interior = self._padded_board.reshape(n + 12, n + 12)[6:6 + n, 6:6 + n]
+        # From this many cells to score, _score_cells_pair_batch beats the per-cell loop
+        self.batch_score_min_moves = 4
+
     def _init_patterns(self):
         """Initialize numeric patterns for scoring."""
         P = 1  # Player
@@ -122,6 +216,18 @@ class HeuristicEvaluator:
             self.PATS_CLOSED_TWO.append(make_pattern(blocker, P, P, E))
             self.PATS_CLOSED_TWO.append(make_pattern(E, P, P, blocker))
 
+    def _get_line_score_table(self, current_captures, is_critical):
+        """Returns the window -> score table for a scoring context."""
+        key = (current_captures, is_critical)
+        table = self._line_score_tables.get(key)
+        if table is None or len(table) > self.max_line_table_size:
+            table = self._line_score_tables[key] = {}
+        return table
+
+    def clear_move_pair_cache(self):
+        """Drops the cached move pair scores of score_moves_pair."""
+        self._move_pair_caches.clear()
+
     def score_line_numeric(self, line, current_captures=0, is_critical=False):
         """
         Scores a line using optimized single-pass pattern matching.
@@ -264,41 +370,283 @@ class HeuristicEvaluator:
     def score_lines_at(self, r, c, board, player, opponent, is_critical=False, current_captures=0):
         """
         Scores the 4 lines (H, V, D1, D2) passing through (r,c).
-        Uses numeric evaluation with optimized inline line extraction.
+        Windows are sliced out of the board through the precomputed tables, encoded
+        to the numeric line format with a byte translation table, and scored
+        through the window -> score lookup table.
         """
         score = 0
+        encode = self._encode[player]
+        table = self._get_line_score_table(current_captures, is_critical)
 
-        # Evaluate 4 directions with inline line extraction (avoids function calls)
-        for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-            # Fill the reusable line buffer
-            for i in range(-6, 7):
-                cr, cc = r + dr * i, c + dc * i
-                idx = i + 6
-                if not (0 <= cr < self.board_size and 0 <= cc < self.board_size):
-                    self._line_buffer[idx] = 3  # Out of bounds
-                else:
-                    piece = board[cr * self.board_size + cc]
-                    if piece == 0:
-                        self._line_buffer[idx] = 0  # Empty
-                    elif piece == player:
-                        self._line_buffer[idx] = 1  # Player
-                    else:  # piece == opponent
-                        self._line_buffer[idx] = 2  # Opponent
-
-            # Score the line (reads from self._line_buffer)
-            score += self.score_line_numeric(self._line_buffer, current_captures, is_critical)
+        for head, cells, tail in self._line_windows[r * self.board_size + c]:
+            line = head + board[cells].translate(encode) + tail
+            line_score = table.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), current_captures, is_critical)
+                table[line] = line_score
+            score += line_score
 
         return score
 
+    def score_moves_pair(self, moves, board, player, opponent, is_critical_me=False, is_critical_opp=False):
+        """
+        Scores each empty cell in moves as a move for player and as a move for opponent.
+        Equivalent to placing each stone in turn and calling score_lines_at, but the
+        board itself is never modified. Cells whose windows are unchanged since they
+        were last scored come from the move pair cache; the others are scored
+        together with NumPy (_score_cells_pair_batch) when there are enough of them.
+
+        Returns:
+            list: (player_score, opponent_score) for each move, in order
+        """
+        n = self.board_size
+        line_windows = self._line_windows
+        cache_key = (player, is_critical_me, is_critical_opp)
+        cache = self._move_pair_caches.get(cache_key)
+        if cache is None or len(cache) > self.max_move_pair_cache_size:
+            cache = self._move_pair_caches[cache_key] = {}
+        snapshot = bytes(board)
+        scores = []
+        missed = []  # (position in scores, cell, cache key)
+
+        for r, c in moves:
+            idx = r * n + c
+            key = (idx, b''.join([snapshot[window] for _, window, _ in line_windows[idx]]))
+            pair = cache.get(key)
+            if pair is None:
+                missed.append((len(scores), idx, key))
+            scores.append(pair)
+
+        if missed:
+            cells = [idx for _, idx, _ in missed]
+            if len(cells) >= self.batch_score_min_moves:
+                pairs = self._score_cells_pair_batch(
+                    cells, snapshot, player, opponent, is_critical_me, is_critical_opp
+                )
+            else:
+                pairs = self._score_cells_pair(
+                    cells, board, player, opponent, is_critical_me, is_critical_opp
+                )
+            for (position, _, key), pair in zip(missed, pairs, strict=True):
+                cache[key] = scores[position] = pair
+
+        return scores
+
+    def _score_cells_pair(self, cells, board, player, opponent, is_critical_me, is_critical_opp):
+        """
+        (player_score, opponent_score) of each empty cell, one window at a time:
+        each window is gathered once and the candidate stone is written into the
+        gathered copy.
+        """
+        line_windows = self._line_windows
+        score_line_numeric = self.score_line_numeric
+        encode_me = self._encode[player]
+        encode_opp = self._encode[opponent]
+        table_me = self._get_line_score_table(0, is_critical_me)
+        table_opp = self._get_line_score_table(0, is_critical_opp)
+        pairs = []
+
+        for idx in cells:
+            score_me = 0
+            score_opp = 0
+            for head, window, tail in line_windows[idx]:
+                window_cells = board[window]
+                # The cell sits at window position 6, after the leading boundary cells
+                center = 6 - len(head)
+
+                window_cells[center] = player
+                line = head + window_cells.translate(encode_me) + tail
+                line_score = table_me.get(line)
+                if line_score is None:
+                    line_score = score_line_numeric(list(line), 0, is_critical_me)
+                    table_me[line] = line_score
+                score_me += line_score
+
+                window_cells[center] = opponent
+                line = head + window_cells.translate(encode_opp) + tail
+                line_score = table_opp.get(line)
+                if line_score is None:
+                    line_score = score_line_numeric(list(line), 0, is_critical_opp)
+                    table_opp[line] = line_score
+                score_opp += line_score
+
+            pairs.append((score_me, score_opp))
+
+        return pairs
+
+    def _score_cells_pair_batch(self, cells, snapshot, player, opponent, is_critical_me, is_critical_opp):
+        """
+        Same as _score_cells_pair, but the windows of all cells are gathered and
+        encoded by a few NumPy calls on the padded board; only the window -> score
+        lookups stay per window.
+        """
+        n = self.board_size
+        score_line_numeric = self.score_line_numeric
+        table_me = self._get_line_score_table(0, is_critical_me)
+        table_opp = self._get_line_score_table(0, is_critical_opp)
+
+        self._padded_interior[:] = np.frombuffer(snapshot, dtype=np.uint8).reshape(n, n)
+        windows = self._padded_board[self._window_index[cells]]
+        windows[:, :, 6] = player
+        lines_me = self._encode_array[player][windows].tobytes()
+        windows[:, :, 6] = opponent
+        lines_opp = self._encode_array[opponent][windows].tobytes()
+
+        cell_stride = 13 * len(self._line_axes)
+        pairs = []
+        for start in range(0, len(lines_me), cell_stride):
+            score_me = 0
+            score_opp = 0
+            for offset in range(start, start + cell_stride, 13):
+                line = lines_me[offset:offset + 13]
+                line_score = table_me.get(line)
+                if line_score is None:
+                    line_score = score_line_numeric(list(line), 0, is_critical_me)
+                    table_me[line] = line_score
+                score_me += line_score
+
+                line = lines_opp[offset:offset + 13]
+                line_score = table_opp.get(line)
+                if line_score is None:
+                    line_score = score_line_numeric(list(line), 0, is_critical_opp)
+                    table_opp[line] = line_score
+                score_opp += line_score
+
+            pairs.append((score_me, score_opp))
+
+        return pairs
+
+    def score_lines_at_captured(self, r, c, board, player, opponent, captured, is_critical=False):
+        """
+        Scores the 4 lines through (r,c) with and without the captured stones.
+        The board must already have the captured stones removed; their "before"
+        state is patched into the encoded windows instead of being written back
+        to the board.
+
+        Args:
+            captured: List of (row, col) of the removed stones (owned by player)
+
+        Returns:
+            tuple: (score_with_captured_stones, score_without)
+        """
+        score_before = 0
+        score_after = 0
+        encode = self._encode[player]
+        table = self._get_line_score_table(0, is_critical)
+
+        for (dr, dc), (head, cells, tail) in zip(self._line_axes, self._line_windows[r * self.board_size + c], strict=True):
+            line = head + board[cells].translate(encode) + tail
+            line_score = table.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), 0, is_critical)
+                table[line] = line_score
+            score_after += line_score
+
+            # Window position of each captured stone lying on this axis
+            restored = bytearray(line)
+            for (cr, cc) in captured:
+                k = cr - r if dr else cc - c
+                if -6 <= k <= 6 and cr - r == dr * k and cc - c == dc * k:
+                    restored[6 + k] = 1
+            line = bytes(restored)
+            line_score = table.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(restored), 0, is_critical)
+                table[line] = line_score
+            score_before += line_score
+
+        return score_before, score_after
+
+    def score_move_delta(self, r, c, board, player, opponent, captured,
+                         is_critical_me=False, is_critical_opp=False):
+        """
+        Scores how player's move at (r,c) changed the lines through it, and the
+        lines through the stones it captured, in a single pass.
+        The board must already show the move; the position before it (empty (r,c),
+        captured stones back) is patched into the encoded windows, so each window
+        around (r,c) is gathered once for both the before and after scores.
+
+        Args:
+            captured: List of (row, col) of the captured stones (owned by opponent)
+
+        Returns:
+            tuple: (delta_my_lines, delta_opp_lines, delta_captured_correction)
+        """
+        before_me = after_me = 0
+        before_opp = after_opp = 0
+        encode_me = self._encode[player]
+        encode_opp = self._encode[opponent]
+        table_me = self._get_line_score_table(0, is_critical_me)
+        table_opp = self._get_line_score_table(0, is_critical_opp)
+
+        for (dr, dc), (head, window, tail) in zip(self._line_axes, self._line_windows[r * self.board_size + c], strict=True):
+            cells = board[window]
+
+            # Window position of each captured stone lying on this axis
+            restored = []
+            for (cr, cc) in captured:
+                k = cr - r if dr else cc - c
+                if -6 <= k <= 6 and cr - r == dr * k and cc - c == dc * k:
+                    restored.append(6 + k)
+
+            line = head + cells.translate(encode_me) + tail
+            line_score = table_me.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), 0, is_critical_me)
+                table_me[line] = line_score
+            after_me += line_score
+
+            line = bytearray(line)
+            line[6] = 0
+            for k in restored:
+                line[k] = 2
+            line = bytes(line)
+            line_score = table_me.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), 0, is_critical_me)
+                table_me[line] = line_score
+            before_me += line_score
+
+            line = head + cells.translate(encode_opp) + tail
+            line_score = table_opp.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), 0, is_critical_opp)
+                table_opp[line] = line_score
+            after_opp += line_score
+
+            line = bytearray(line)
+            line[6] = 0
+            for k in restored:
+                line[k] = 1
+            line = bytes(line)
+            line_score = table_opp.get(line)
+            if line_score is None:
+                line_score = self.score_line_numeric(list(line), 0, is_critical_opp)
+                table_opp[line] = line_score
+            before_opp += line_score
+
+        delta_captured_correction = 0
+        if captured:
+            # All captured stones are restored at once, so a five they were part of
+            # is not mistaken for a broken four. Lines shared by two captured stones
+            # are counted once per stone, consistently before and after.
+            caps_before = 0
+            caps_after = 0
+            for (cr, cc) in captured:
+                before, after = self.score_lines_at_captured(
+                    cr, cc, board, opponent, player, captured, is_critical_opp
+                )
+                caps_before += before
+                caps_after += after
+            delta_captured_correction = caps_after - caps_before
+
+        return after_me - before_me, after_opp - before_opp, delta_captured_correction
+
     def calculate_player_score(self, board, captures, player, win_by_captures):
         """
         Calculates the total score for a player across the entire board.
         """
-        from srcs.utils import get_line_coords, get_line_values
-
         score = 0
-        opponent = 2 if player == 1 else 1
-
         my_captures = captures[player]
 
         if my_captures >= (win_by_captures * 2):
@@ -332,19 +680,21 @@ class HeuristicEvaluator:
         # Critical capture check: if we are 1 pair away from winning, threats are deadly
         is_critical = my_captures >= (win_by_captures * 2 - 2)
 
+        table = self._get_line_score_table(my_captures, is_critical)
+        encode = self._encode[player]
+        line_windows = self._line_windows
+        line_keys = self._line_keys
         lines_seen = set()
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                idx = r * self.board_size + c
-                if board[idx] != 0:
-                    for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-                        line_coords = get_line_coords(r, c, dr, dc, self.board_size)
-                        line_key = tuple(sorted(line_coords))
-
-                        if line_key not in lines_seen:
-                            lines_seen.add(line_key)
-                            line_vals = get_line_values(r, c, dr, dc, board, player, opponent, self.board_size)
-                            score += self.score_line_numeric(line_vals, my_captures, is_critical)
+        for idx in np.flatnonzero(np.frombuffer(board, dtype=np.uint8)).tolist():
+            for key, (head, cells, tail) in zip(line_keys[idx], line_windows[idx], strict=True):
+                if key not in lines_seen:
+                    lines_seen.add(key)
+                    line = head + board[cells].translate(encode) + tail
+                    line_score = table.get(line)
+                    if line_score is None:
+                        line_score = self.score_line_numeric(list(line), my_captures, is_critical)
+                        table[line] = line_score
+                    score += line_score
 
         return score
 
@@ -352,7 +702,7 @@ class HeuristicEvaluator:
         """
         Evaluates the entire board from the perspective of the given player.
         """
-        opponent = 2 if player == 1 else 1
+        opponent = OPPONENT[player]
         my_score = self.calculate_player_score(board, captures, player, win_by_captures)
         opponent_score = self.calculate_player_score(board, captures, opponent, win_by_captures)
 
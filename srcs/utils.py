@@ -2,41 +2,92 @@
 Utility functions shared across the Gomoku game modules.
 """
 
+from functools import cache
 
+# Direction offsets, hoisted to module level so hot loops don't rebuild them.
+# The first four cover every axis once; the full eight are needed for captures.
+DIRECTIONS_4 = ((0, 1), (1, 0), (1, 1), (1, -1))
+DIRECTIONS_8 = DIRECTIONS_4 + ((0, -1), (-1, 0), (-1, -1), (-1, 1))
 
+# Opponent lookup indexed by player (1 <-> 2), avoiding a branch in hot paths.
+OPPONENT = (0, 2, 1)
 
-def get_line_values(r, c, dr, dc, board, player, opponent, board_size):
+
+@cache
+def build_neighbor_table(board_size, max_steps=5):
+    """
+    Precomputes, for every cell, the flat indices of the cells 1..max_steps away
+    in each of the DIRECTIONS_8 directions. Rays stop at the board edge, so
+    walking one needs no bounds checks. Directions d and d + 4 are opposite.
+    Returns a tuple indexed [r * board_size + c][direction] of index tuples.
+    The table is immutable and built once per board size, then shared.
+    """
+    table = []
+    for r in range(board_size):
+        for c in range(board_size):
+            rays = []
+            for dr, dc in DIRECTIONS_8:
+                ray = []
+                for step in range(1, max_steps + 1):
+                    nr, nc = r + dr * step, c + dc * step
+                    if not (0 <= nr < board_size and 0 <= nc < board_size):
+                        break
+                    ray.append(nr * board_size + nc)
+                rays.append(tuple(ray))
+            table.append(tuple(rays))
+    return tuple(table)
+
+
+@cache
+def build_capture_table(board_size):
     """
-    Gets a numerical representation of a line passing through (r,c).
-    Values: 0=Empty, 1=Player, 2=Opponent, 3=OutOfBounds
-    Returns a list of integers.
-    NOTE: board is 1D array now.
+    Precomputes, for every cell, the capture patterns (P-O-O-P) starting there:
+    one (idx1, idx2, idx3, (r1, c1), (r2, c2)) entry per direction of
+    DIRECTIONS_8 that stays on the board for 3 steps, where idx1/idx2 hold the
+    pair to capture and idx3 the flanking stone. Partially evaluates the capture
+    scan for the board size: no bounds checks or index arithmetic are left.
+    Returns a tuple indexed by r * board_size + c.
     """
-    line = [0] * 13
-    for i in range(-6, 7):
-        cr, cc = r + dr * i, c + dc * i
-        idx = i + 6
-        if not (0 <= cr < board_size and 0 <= cc < board_size):
-            line[idx] = 3  # X
-        else:
-            piece = board[cr * board_size + cc]
-            if piece == 0:
-                line[idx] = 0  # E
-            elif piece == player:
-                line[idx] = 1  # P
-            elif piece == opponent:
-                line[idx] = 2  # O
-    return line
-
-
-def get_line_coords(r, c, dr, dc, board_size):
+    table = []
+    for rays in build_neighbor_table(board_size):
+        patterns = []
+        for ray in rays:
+            if len(ray) >= 3:
+                patterns.append((ray[0], ray[1], ray[2],
+                                 divmod(ray[0], board_size), divmod(ray[1], board_size)))
+        table.append(tuple(patterns))
+    return tuple(table)
+
+
+@cache
+def build_line_windows(board_size, axes=DIRECTIONS_4, radius=6):
     """
-    Gets the coordinates of all points in a line passing through (r,c).
-    Used for deduplication in full board evaluation.
+    For every cell, the (2 * radius + 1)-cell window centred on it along each of
+    axes (13 cells by default), as (head, slice, tail): the in-bounds cells of a
+    ray are contiguous, so a window is (lead boundary cells) + board slice +
+    (tail boundary cells), with boundary cells encoded as 3. Translating the
+    slice with a board value -> code table gives the encoded window without any
+    per-step bounds checks.
+    Returns a tuple indexed [r * board_size + c][axis], built once per board size.
     """
-    coords = []
-    for i in range(-4, 5):
-        cr, cc = r + dr * i, c + dc * i
-        if 0 <= cr < board_size and 0 <= cc < board_size:
-            coords.append((cr, cc))
-    return coords
+    width = 2 * radius + 1
+    line_windows = []
+    for r in range(board_size):
+        for c in range(board_size):
+            windows = []
+            for dr, dc in axes:
+                indices = []
+                lead = 0
+                for i in range(-radius, radius + 1):
+                    cr, cc = r + dr * i, c + dc * i
+                    if 0 <= cr < board_size and 0 <= cc < board_size:
+                        indices.append(cr * board_size + cc)
+                    elif not indices:
+                        lead += 1
+                head = bytes([3] * lead)
+                tail = bytes([3] * (width - lead - len(indices)))
+                cells = slice(indices[0], indices[-1] + 1, dr * board_size + dc)
+                windows.append((head, cells, tail))
+            line_windows.append(tuple(windows))
+    return tuple(line_windows)
+
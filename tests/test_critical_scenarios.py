@@ -27,7 +27,7 @@ def setup_board_directly(logic, pieces_dict, captures_dict):
     Returns:
         tuple: (board, captures, zobrist_hash)
     """
-    board = [0] * (logic.BOARD_SIZE * logic.BOARD_SIZE)
+    board = bytearray(logic.BOARD_SIZE * logic.BOARD_SIZE)
     zobrist_hash = logic.compute_initial_hash()
 
     for (r, c), player in pieces_dict.items():
@@ -7,12 +7,16 @@ These scenarios test if the AI can:
 3. Handle complex tactical positions
 """
 
+import copy
 import json
+import math
+import random
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from srcs.algorithm import TT_EXACT, GameContext
 from srcs.GomokuAI import GomokuAI
 from srcs.GomokuLogic import GomokuLogic
 
@@ -28,7 +32,7 @@ def setup_position(logic, moves):
     Returns:
         tuple: (board, captures, zobrist_hash)
     """
-    board = [0] * (logic.BOARD_SIZE * logic.BOARD_SIZE)
+    board = bytearray(logic.BOARD_SIZE * logic.BOARD_SIZE)
     captures = {1: 0, 2: 0}
     zobrist_hash = logic.compute_initial_hash()
 
@@ -39,6 +43,48 @@ def setup_position(logic, moves):
     return board, captures, zobrist_hash
 
 
+def make_undo_walk(logic, seed, steps=150):
+    """
+    Plays random legal moves near the centre (captures first), undoing one now
+    and then as the search does.
+
+    Returns:
+        tuple: (positions, captured) - a copy of the board after each make or
+        undo, and the number of stones captured along the way
+    """
+    rng = random.Random(seed)
+    board = bytearray(logic.BOARD_SIZE * logic.BOARD_SIZE)
+    captures = [0, 0, 0]
+    zobrist_hash = logic.compute_initial_hash()
+    history = []
+    positions = []
+    captured_total = 0
+    player = 1
+
+    for _ in range(steps):
+        if history and rng.random() < 0.3:
+            r, c, moved, captured, old_count, old_hash = history.pop()
+            zobrist_hash = logic.undo_move(r, c, moved, board, captured, old_count, captures, old_hash)
+            player = moved
+        else:
+            # Take a capture whenever one is available, so undo has stones to restore
+            capturing = [(r, c) for r in range(6, 13) for c in range(6, 13)
+                         if board[r * logic.BOARD_SIZE + c] == 0
+                         and logic.get_capture_positions(r, c, player, board)]
+            r, c = rng.choice(capturing) if capturing else (rng.randrange(6, 13), rng.randrange(6, 13))
+            if not logic.is_legal_move(r, c, player, board)[0]:
+                continue
+            old_count, old_hash = captures[player], zobrist_hash
+            captured, zobrist_hash = logic.make_move(r, c, player, board, zobrist_hash)
+            captures[player] += len(captured)
+            captured_total += len(captured)
+            history.append((r, c, player, captured, old_count, old_hash))
+            player = 3 - player
+        positions.append(bytearray(board))
+
+    return positions, captured_total
+
+
 def test_block_open_three():
     """Test AI blocks an open three-in-a-row."""
     print("\n" + "="*60)
@@ -354,6 +400,269 @@ def test_complex_tactics():
         return True  # Complex position, hard to judge
 
 
+def test_blocks_all_double_three():
+    """Test AI still moves when every blocking cell is illegal (double-three)."""
+    print("\n" + "="*60)
+    print("TEST 8: Blocking Cells All Illegal")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    logic = GomokuLogic(config)
+    ai = GomokuAI(config)
+
+    moves = [
+        # White has an open three at (9,8)-(9,10)
+        (9, 8, 2), (9, 9, 2), (9, 10, 2),
+        # Black stones making both blocks a double-three
+        (8, 7, 1), (10, 7, 1), (8, 6, 1), (10, 8, 1),
+        (8, 11, 1), (10, 11, 1), (8, 10, 1), (10, 12, 1),
+    ]
+
+    board, captures, zobrist_hash = setup_position(logic, moves)
+
+    print("White has an open three at (9,8)-(9,10)")
+    print("Black's blocks (9,7) and (9,11) are both double-threes")
+    print("Black must still get ordered moves and play a legal one")
+
+    blocks_illegal = all(not logic.is_legal_move(r, c, 1, board)[0] for r, c in [(9, 7), (9, 11)])
+    ordered_moves = ai.get_ordered_moves(board, captures, 1, logic, len(moves), 5)
+    move, time_taken = ai.get_best_move(
+        board, captures, zobrist_hash, 1, 5, logic, len(moves)
+    )
+
+    print(f"\nOrdered moves: {ordered_moves[:5]}")
+    print(f"AI chose: {move}")
+
+    if (blocks_illegal and ordered_moves and move is not None and
+            logic.is_legal_move(move[0], move[1], 1, board)[0]):
+        print("✅ PASS: AI fell back to the other candidates!")
+        return True
+    else:
+        print("❌ FAIL: AI found no move!")
+        return False
+
+
+def test_tt_generations():
+    """Test transposition table entries survive moves but yield to newer searches."""
+    print("\n" + "="*60)
+    print("TEST 9: Transposition Table Generations")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    algo = GomokuAI(config).algorithm
+
+    # Two positions sharing one slot
+    slot = 123
+    deep_hash = (1 << 40) | slot
+    other_hash = (2 << 40) | slot
+
+    algo.advance_generation(1)
+    algo._store_tt_entry(slot, deep_hash, 100, 6, TT_EXACT, (9, 9))
+    algo._store_tt_entry(slot, other_hash, 200, 2, TT_EXACT, (8, 8))
+    deeper_kept = algo.tt_keys[slot] == deep_hash and algo.tt_depths[slot] == 6
+
+    # Next move by the same player: the entry is kept until something replaces it
+    algo.advance_generation(1)
+    kept_across_moves = algo.tt_keys[slot] == deep_hash
+    algo._store_tt_entry(slot, other_hash, 200, 2, TT_EXACT, (8, 8))
+    old_replaced = algo.tt_keys[slot] == other_hash and algo.tt_depths[slot] == 2
+
+    # Scores are from the searching player's view: another player starts afresh
+    algo.advance_generation(2)
+    cleared_for_other_player = algo.tt_keys[slot] is None
+
+    print(f"Deeper entry of the same search kept: {deeper_kept}")
+    print(f"Entry kept across moves: {kept_across_moves}")
+    print(f"Entry of an earlier search replaced: {old_replaced}")
+    print(f"Table cleared for the other player: {cleared_for_other_player}")
+
+    if deeper_kept and kept_across_moves and old_replaced and cleared_for_other_player:
+        print("✅ PASS: Replacement follows the search generations!")
+        return True
+    else:
+        print("❌ FAIL: Wrong transposition table replacement!")
+        return False
+
+
+def test_aspiration_research():
+    """Test aspiration window re-searches end on the full-window score."""
+    print("\n" + "="*60)
+    print("TEST 10: Aspiration Window Re-search")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    # Fixed depth, no time pressure; null move pruning is left out as its
+    # cutoffs depend on the window by design. A window of 1 forces re-searches.
+    config["algorithm_settings"].update(max_depth=3, time_limit=1000,
+                                        enable_null_move_pruning=False,
+                                        aspiration_window_delta=1)
+
+    moves = [(9, 9, 1), (9, 10, 2), (10, 10, 1), (8, 8, 2), (10, 8, 1), (11, 9, 2)]
+
+    results = {}
+    fails = set()
+    for use_aspiration in (False, True):
+        run_config = copy.deepcopy(config)
+        run_config["algorithm_settings"]["enable_aspiration_windows"] = use_aspiration
+        logic = GomokuLogic(run_config)
+        ai = GomokuAI(run_config)
+        board, captures, zobrist_hash = setup_position(logic, moves)
+
+        minimax_root = ai.algorithm.minimax_root
+
+        def recording_root(game_state, ai_player, score, depth, ctx, alpha=-math.inf,
+                           beta=math.inf, pv_move=None, minimax_root=minimax_root):
+            move, result = minimax_root(game_state, ai_player, score, depth, ctx, alpha, beta, pv_move)
+            if alpha != -math.inf and result <= alpha:
+                fails.add("low")
+            if beta != math.inf and result >= beta:
+                fails.add("high")
+            return move, result
+
+        ai.algorithm.minimax_root = recording_root
+        ai.algorithm.advance_generation(1)
+        initial_score = ai.heuristic.evaluate_board(board, captures, 1, 5)
+        results[use_aspiration] = ai.algorithm.iterative_deepening_search(
+            (board, captures, zobrist_hash), 1, initial_score,
+            GameContext(ai, logic, len(moves), 5)
+        )
+
+    print(f"Full window: {results[False]}")
+    print(f"Aspiration:  {results[True]} (failed {sorted(fails)})")
+
+    if fails == {"low", "high"} and results[True] == results[False]:
+        print("✅ PASS: Re-searches returned the full-window result!")
+        return True
+    else:
+        print("❌ FAIL: Aspiration search diverged from the full window!")
+        return False
+
+
+def test_incremental_critical_moves():
+    """Test the incrementally swept critical moves match a full re-sweep."""
+    print("\n" + "="*60)
+    print("TEST 11: Incremental Critical Moves")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    logic = GomokuLogic(config)
+    ai = GomokuAI(config)      # Keeps its line runs across calls
+    fresh = GomokuAI(config)   # Forgets them: every call sweeps the whole board
+
+    checked = 0
+    captured_total = 0
+    mismatches = 0
+    for seed in range(3):
+        positions, captured = make_undo_walk(logic, seed)
+        captured_total += captured
+        for board in positions:
+            for player in (1, 2):
+                incremental = tuple(set(moves) for moves in ai._find_critical_moves(board, player))
+                fresh._critical_cells = None
+                recomputed = tuple(set(moves) for moves in fresh._find_critical_moves(board, player))
+                checked += 1
+                mismatches += incremental != recomputed
+
+    print(f"Positions checked: {checked}, stones captured in the walks: {captured_total}")
+    print(f"Mismatches: {mismatches}")
+
+    if captured_total and not mismatches:
+        print("✅ PASS: Incremental sweep matches the full sweep!")
+        return True
+    else:
+        print("❌ FAIL: Incremental critical moves went stale!")
+        return False
+
+
+def test_double_three_map():
+    """Test the bitboard double-three map flags every double-three after make/undo."""
+    print("\n" + "="*60)
+    print("TEST 12: Double-Three Map")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    logic = GomokuLogic(config)
+    ai = GomokuAI(config)
+    n = logic.BOARD_SIZE
+
+    captured_total = 0
+    illegal = 0
+    missed = 0
+    for seed in range(3):
+        positions, captured = make_undo_walk(logic, seed)
+        captured_total += captured
+        for board in positions:
+            _, stones = ai._get_bitboards(board)
+            for player in (1, 2):
+                maybe_double_three = ai._get_double_three_map(stones[player])
+                for r in range(n):
+                    for c in range(n):
+                        if board[r * n + c] == 0 and not logic.is_legal_move(r, c, player, board)[0]:
+                            illegal += 1
+                            missed += not maybe_double_three[ai._bitboard_row_ofs[r] + c]
+
+    print(f"Double-threes found: {illegal}, stones captured in the walks: {captured_total}")
+    print(f"Double-threes not flagged: {missed}")
+
+    if illegal and captured_total and not missed:
+        print("✅ PASS: Double-three map is complete after make/undo!")
+        return True
+    else:
+        print("❌ FAIL: Double-three map missed an illegal move!")
+        return False
+
+
+def test_fives_at_every_depth():
+    """Test completing and blocking a five do not depend on the depth reached."""
+    print("\n" + "="*60)
+    print("TEST 13: Fives At Every Depth")
+    print("="*60)
+
+    with open('config.json') as f:
+        config = json.load(f)
+
+    # The positions of TEST 2 and TEST 3: White completes its four, or blocks Black's
+    positions = [
+        ([(9, 9, 1), (10, 9, 2), (9, 8, 1), (10, 10, 2), (9, 7, 1), (10, 11, 2),
+          (8, 8, 1), (10, 12, 2), (7, 8, 1)], [(10, 8), (10, 13)]),
+        ([(9, 9, 1), (8, 9, 2), (9, 10, 1), (8, 10, 2), (9, 11, 1), (8, 11, 2),
+          (9, 12, 1)], [(9, 8), (9, 13)]),
+    ]
+
+    # Fixed depths without time pressure: a five completed at the horizon must
+    # still be answered, whatever the parity of the depth
+    wrong = []
+    for moves, expected in positions:
+        for depth in range(1, 10):
+            run_config = copy.deepcopy(config)
+            run_config["algorithm_settings"].update(max_depth=depth, time_limit=1000)
+            logic = GomokuLogic(run_config)
+            ai = GomokuAI(run_config)
+            board, captures, zobrist_hash = setup_position(logic, moves)
+            move, _ = ai.get_best_move(board, captures, zobrist_hash, 2, 5, logic, len(moves))
+            if move not in expected:
+                wrong.append((depth, move))
+
+    print(f"Wrong moves (depth, move): {wrong}")
+
+    if not wrong:
+        print("✅ PASS: Fives are completed and blocked at every depth!")
+        return True
+    else:
+        print("❌ FAIL: The chosen move depends on the depth!")
+        return False
+
+
 def run_all_tests():
     """Run all tactical tests."""
     print("\n" + "="*60)
@@ -368,6 +677,12 @@ def run_all_tests():
         ("Recognize Capture", test_recognize_capture_opportunity),
         ("Defend Capture Threat", test_defend_capture_threat),
         ("Complex Tactics", test_complex_tactics),
+        ("Blocks All Double-Three", test_blocks_all_double_three),
+        ("TT Generations", test_tt_generations),
+        ("Aspiration Re-search", test_aspiration_research),
+        ("Incremental Critical Moves", test_incremental_critical_moves),
+        ("Double-Three Map", test_double_three_map),
+        ("Fives At Every Depth", test_fives_at_every_depth),
     ]
 
     results = []